@@ -5,6 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from db import Base
+from db.engine import DATABASE_URL
 from db.models import *
 
 # this is the Alembic Config object, which provides
@@ -16,6 +17,12 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# use the database configured for the panel instead of alembic.ini
+config.set_main_option(
+    "sqlalchemy.url",
+    DATABASE_URL.render_as_string(hide_password=False).replace("%", "%%"),
+)
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -1,16 +1,20 @@
 import os
+from datetime import datetime
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
-from backend.operations.daily_checks import check_user_expiry_date
+from backend.operations.jobs import run_job, scheduler
+from backend.operations.leader import start_leader_election, stop_leader_election
 from backend.config import config
 from backend.routers import all_routers
 from backend.routers.sub import router as subscription_router
+from backend.node.requests import close_clients
+from backend.node.profile_cache import profile_cache
+from backend.node.outbox import start_outbox_worker, stop_outbox_worker
 from backend.version import __version__
 
 
@@ -39,21 +43,60 @@ api.add_middleware(
 
 
 def start_scheduler():
-    """This function starts the scheduler for every 5 minutes tasks"""
-    scheduler = AsyncIOScheduler()
+    """This function starts the scheduler for periodic tasks"""
+    # one instance per job, runs missed while the loop was busy are merged
+    # into one instead of piling up
+    options = dict(
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=config.JOB_MISFIRE_GRACE_TIME,
+        replace_existing=True,
+    )
+    # users are expired on time by the expiry timer, this only catches changes
+    # made outside the panel
     scheduler.add_job(
-        check_user_expiry_date,
-        CronTrigger(minute="*/5"),
+        run_job,
+        IntervalTrigger(seconds=config.EXPIRY_SWEEP_INTERVAL),
+        args=["check_user_expiry"],
         id="check_user_expiry",
-        replace_existing=True,
+        **options,
+    )
+    scheduler.add_job(
+        run_job,
+        IntervalTrigger(seconds=config.NODE_HEALTH_INTERVAL),
+        args=["probe_nodes"],
+        id="probe_nodes",
+        next_run_time=datetime.now(),
+        **options,
+    )
+    scheduler.add_job(
+        run_job,
+        IntervalTrigger(seconds=config.RECONCILE_INTERVAL),
+        args=["reconcile_nodes"],
+        id="reconcile_nodes",
+        **options,
     )
 
+    # every worker runs the schedule, jobs in LEADER_JOBS are skipped on all but
+    # the worker holding the scheduler lease
     scheduler.start()
 
 
 @api.on_event("startup")
 async def startup_event():
+    profile_cache.load()
     start_scheduler()
+    start_outbox_worker()
+    start_leader_election()
+
+
+@api.on_event("shutdown")
+async def shutdown_event():
+    await stop_leader_election()
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+    await stop_outbox_worker()
+    await close_clients()
 
 
 for router in all_routers:
@@ -1,2 +1,7 @@
 from .auth import router
-from .hash import hash_password, verify_password
+from .hash import (
+    hash_password,
+    hash_password_async,
+    verify_password,
+    verify_password_async,
+)
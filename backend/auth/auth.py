@@ -1,14 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
-from backend.auth.hash import verify_password
-from backend.db.engine import get_db
+from backend.auth.hash import verify_password_async
+from backend.auth import throttle
+from backend.db.engine import get_async_db
 from backend.config import config
-from backend.db import crud
+from backend.db import async_crud
 
 
 ALGORITHM = "HS256"
@@ -17,15 +18,15 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 router = APIRouter(tags=["Login"])
 
 
-def authenticate_user(db: Session, username: str, password: str):
+async def authenticate_user(db: AsyncSession, username: str, password: str):
     main_admin_username = config.ADMIN_USERNAME
     main_admin_password = config.ADMIN_PASSWORD
     if username == main_admin_username and password == main_admin_password:
         return {"username": username, "type": "main_admin"}
 
-    admin = crud.it_is_admin(db, username=username)
+    admin = await async_crud.it_is_admin(db, username=username)
     if admin:
-        if verify_password(password, admin.password):
+        if await verify_password_async(password, admin.password):
             return {"username": admin.username, "type": "admin"}
 
     return None
@@ -41,9 +42,23 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 
 @router.post("/login")
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    admin = authenticate_user(db, form_data.username, form_data.password)
+    keys = throttle.login_keys(
+        form_data.username, request.client.host if request.client else None
+    )
+    wait = throttle.retry_after(keys)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later",
+            headers={"Retry-After": str(wait)},
+        )
+
+    attempt = throttle.record_attempt(keys)
+    admin = await authenticate_user(db, form_data.username, form_data.password)
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -51,6 +66,8 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    throttle.record_success(keys, attempt)
+
     access_token_expires = timedelta(seconds=config.JWT_ACCESS_TOKEN_EXPIRES)
     access_token = create_access_token(
         data={"sub": admin["username"], "type": admin["type"]},
@@ -1,7 +1,28 @@
+import asyncio
+import hashlib
+import hmac
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
+from backend.config import config
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt takes tens of milliseconds of cpu, it runs on a few threads so it
+# never blocks the event loop and can't take every core
+_executor = ThreadPoolExecutor(
+    max_workers=config.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+)
+
+# digests of recently verified (password, hash) pairs and when they expire,
+# the key is random per process so the digests are useless outside of it
+_cache_key = secrets.token_bytes(32)
+_verified: OrderedDict[bytes, float] = OrderedDict()
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -9,3 +30,38 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def _digest(plain_password: str, hashed_password: str) -> bytes:
+    # the stored hash is part of the key, a password change misses the cache
+    message = f"{hashed_password}\0{plain_password}".encode()
+    return hmac.new(_cache_key, message, hashlib.sha256).digest()
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifies a password on the hashing threads, skipping bcrypt for pairs
+    verified in the last PASSWORD_CACHE_TTL seconds.
+    """
+    digest = _digest(plain_password, hashed_password)
+    expires_at = _verified.get(digest)
+    if expires_at is not None:
+        if expires_at > time.monotonic():
+            return True
+        del _verified[digest]
+
+    loop = asyncio.get_running_loop()
+    valid = await loop.run_in_executor(
+        _executor, verify_password, plain_password, hashed_password
+    )
+    # only successes are kept, failures always pay the full bcrypt cost
+    if valid and config.PASSWORD_CACHE_TTL > 0:
+        _verified[digest] = time.monotonic() + config.PASSWORD_CACHE_TTL
+        _verified.move_to_end(digest)
+        while len(_verified) > config.PASSWORD_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return valid
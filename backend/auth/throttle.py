@@ -0,0 +1,89 @@
+import math
+import time
+from collections import OrderedDict, deque
+
+from backend.config import config
+
+# failed login times per key, a key is "user:<name>" or "ip:<address>", ordered
+# by the latest attempt so stale keys sit at the front
+_failures: OrderedDict[str, deque[float]] = OrderedDict()
+_MAX_KEYS = 100000  # the least recently attempted keys are evicted past it
+
+
+def _limit(key: str) -> int:
+    if key.startswith("user:"):
+        return config.LOGIN_MAX_FAILURES_PER_USER
+    return config.LOGIN_MAX_FAILURES_PER_IP
+
+
+def _recent(key: str, now: float) -> deque[float] | None:
+    failures = _failures.get(key)
+    if failures is None:
+        return None
+    while failures and failures[0] <= now - config.LOGIN_FAILURE_WINDOW:
+        failures.popleft()
+    if not failures:
+        del _failures[key]
+        return None
+    return failures
+
+
+def login_keys(username: str, ip: str | None) -> list[str]:
+    # admin names are case sensitive, so are the keys
+    keys = [f"user:{username}"]
+    if ip:
+        keys.append(f"ip:{ip}")
+    return keys
+
+
+def retry_after(keys: list[str]) -> int:
+    """Seconds until a login for these keys is allowed again, 0 when it is"""
+    now = time.monotonic()
+    wait = 0.0
+    for key in keys:
+        failures = _recent(key, now)
+        limit = _limit(key)
+        if failures and len(failures) >= limit:
+            # allowed again once enough failures leave the window
+            oldest = failures[len(failures) - limit]
+            wait = max(wait, oldest + config.LOGIN_FAILURE_WINDOW - now)
+    return math.ceil(wait)
+
+
+def record_attempt(keys: list[str]) -> float:
+    """Counts a login as failed until it succeeds, so a burst of concurrent
+    attempts is throttled before any of them finishes hashing.
+    """
+    now = time.monotonic()
+    for key in keys:
+        _failures.setdefault(key, deque()).append(now)
+        _failures.move_to_end(key)
+    _prune(now)
+    return now
+
+
+def _prune(now: float):
+    """Drops keys from the front while they are out of the window or over the
+    limit, each key is dropped once so the cost stays constant on average
+    """
+    while _failures:
+        key, failures = next(iter(_failures.items()))
+        stale = not failures or failures[-1] <= now - config.LOGIN_FAILURE_WINDOW
+        if not stale and len(_failures) <= _MAX_KEYS:
+            return
+        del _failures[key]
+
+
+def record_success(keys: list[str], attempt: float):
+    """Forgets the user's failures and drops the attempt from the other keys"""
+    for key in keys:
+        failures = _failures.get(key)
+        if failures is None:
+            continue
+        if key.startswith("user:"):
+            del _failures[key]
+        else:
+            try:
+                failures.remove(attempt)
+            except ValueError:
+                pass
@@ -17,8 +17,68 @@ class Setting(BaseSettings):
     SSL_CERTFILE: Optional[str] = None
     JWT_SECRET_KEY: str
     JWT_ACCESS_TOKEN_EXPIRES: int = 86400  # in seconds
+    PASSWORD_HASH_WORKERS: int = 2  # threads running bcrypt
+    # in seconds, repeated logins skip bcrypt, 0 disables it
+    PASSWORD_CACHE_TTL: int = 300
+    PASSWORD_CACHE_SIZE: int = 1000  # verified passwords kept in memory
+    LOGIN_FAILURE_WINDOW: int = 300  # in seconds
+    LOGIN_MAX_FAILURES_PER_USER: int = 5  # failed logins per username in the window
+    # failed logins per client address in the window
+    LOGIN_MAX_FAILURES_PER_IP: int = 20
     SUBSCRIPTION_URL_PREFIX: Optional[str] = None
     SUBSCRIPTION_PATH: str = "sub"
+    SUBSCRIPTION_CACHE_SIZE: int = 10000  # rendered pages kept in memory
+    SUBSCRIPTION_CACHE_TTL: int = 60  # in seconds, per worker copies expire after it
+    USER_IO_CHUNK_SIZE: int = 1000  # rows per import transaction and export batch
+    NODE_MAX_CONNECTIONS: int = 10  # keep-alive pool size per node
+    NODE_KEEPALIVE_EXPIRY: int = 60  # in seconds
+    NODE_FANOUT_CONCURRENCY: int = 10  # nodes handled in parallel
+    NODE_HEALTH_INTERVAL: int = 30  # in seconds
+    NODE_TIMEOUT_STATUS: float = 5  # in seconds
+    NODE_TIMEOUT_INFO: float = 10
+    NODE_TIMEOUT_CREATE: float = 25
+    NODE_TIMEOUT_CHANGE_STATUS: float = 10
+    NODE_TIMEOUT_DELETE: float = 25
+    NODE_TIMEOUT_DOWNLOAD: float = 25
+    NODE_TIMEOUT_BATCH: float = 60
+    NODE_BATCH_SIZE: int = 500  # user actions per batch request
+    NODE_ACTIONS_PER_SECOND: float = 0  # per node rate limit, 0 disables it
+    NODE_BREAKER_THRESHOLD: int = 3  # consecutive failures before failing fast
+    NODE_BREAKER_BASE_DELAY: float = 5  # in seconds, doubled on every reopen
+    NODE_BREAKER_MAX_DELAY: float = 300  # in seconds
+    NODE_JOB_WORKERS: int = 10  # node jobs running in parallel
+    NODE_JOB_BATCH_SIZE: int = 500
+    NODE_JOB_POLL_INTERVAL: float = 10  # in seconds
+    NODE_JOB_CLAIM_TIMEOUT: int = 900  # in seconds, then a crashed drain's jobs retry
+    NODE_JOB_MAX_ATTEMPTS: int = 20
+    NODE_JOB_BASE_DELAY: float = 5  # in seconds, doubled on every retry
+    NODE_JOB_MAX_DELAY: float = 600  # in seconds
+    NODE_JOB_FAILED_RETENTION: int = 7 * 86400  # in seconds, failed jobs kept that long
+    RECONCILE_INTERVAL: int = 3600  # in seconds
+    EXPIRY_TIMER_WINDOW: int = 7  # days of upcoming expirations kept in memory
+    EXPIRY_TIMER_RELOAD_INTERVAL: int = 60  # in seconds
+    EXPIRY_SWEEP_INTERVAL: int = 300  # in seconds, full scan as a safety net
+    JOB_HISTORY_SIZE: int = 200  # runs kept in the database for each scheduler job
+    JOB_MISFIRE_GRACE_TIME: int = 60  # in seconds, late runs past it are skipped
+    LEADER_LEASE_TTL: int = 30  # in seconds, a dead leader is replaced after it
+    LEADER_RENEW_INTERVAL: int = 10  # in seconds
+    PROFILE_CACHE_DIR: str = os.path.join(
+        os.path.dirname(__file__), "..", "data", "profiles"
+    )
+    PROFILE_CACHE_MAX_BYTES: int = 50 * 1024 * 1024
+    PROFILE_CACHE_TTL: int = 86400  # in seconds, then revalidated with the node
+    PROFILE_STREAM_CHUNK_SIZE: int = 16 * 1024  # in bytes
+    DATABASE_URL: Optional[str] = None  # data/ov-panel.db (sqlite) when empty
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # in seconds
+    DB_POOL_RECYCLE: int = 3600  # in seconds
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT: int = 5000  # in milliseconds
+    SQLITE_CACHE_SIZE: int = -65536  # negative values are in KiB
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # in bytes
+    SQLITE_TEMP_STORE: str = "MEMORY"
 
     class Config:
         env_file = os.path.join(os.path.dirname(__file__), "..", ".env")
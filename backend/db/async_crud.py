@@ -0,0 +1,789 @@
+from sqlalchemy import (
+    Date,
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from fastapi import HTTPException
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+from backend.auth.hash import hash_password_async
+from backend.logger import logger
+from backend.schema._input import (
+    AdminCreate,
+    CreateUser,
+    UpdateUser,
+    NodeCreate,
+    UserFilter,
+)
+from .models import User, Admin, Node, Settings, NodeJob, SchedulerLease, SchedulerRun
+
+
+# used by the request handlers and jobs
+async def get_user_states(db: AsyncSession) -> dict[str, bool]:
+    """Returns {name: is_active} of every user, read from the database even when
+    the users are loaded in the session
+    """
+    result = await db.execute(select(User.name, User.is_active))
+    return dict(result.all())
+
+
+USER_SORT_COLUMNS = {"id": User.id, "name": User.name, "expiry_date": User.expiry_date}
+
+
+def user_filters(filters: UserFilter) -> list:
+    """SQL conditions for a user filter"""
+    conditions = []
+    if filters.owner is not None:
+        conditions.append(User.owner == filters.owner)
+    if filters.is_active is not None:
+        conditions.append(User.is_active == filters.is_active)
+    if filters.expiring_before is not None:
+        conditions.append(User.expiry_date < filters.expiring_before)
+    if filters.expiring_after is not None:
+        conditions.append(User.expiry_date > filters.expiring_after)
+    if filters.search:
+        prefix = (
+            filters.search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        # case insensitive like SQLite's LIKE, PostgreSQL's is case sensitive
+        conditions.append(func.lower(User.name).like(f"{prefix.lower()}%", escape="\\"))
+    return conditions
+
+
+def bulk_user_conditions(
+    uuids: list[str] | None, filters: UserFilter | None, owner: str | None
+) -> list:
+    """SQL conditions selecting users by uuid and/or filter, limited to an owner"""
+    conditions = user_filters(filters) if filters is not None else []
+    if uuids is not None:
+        conditions.append(User.uuid.in_(uuids))
+    if owner is not None:
+        conditions.append(User.owner == owner)
+    return conditions
+
+
+async def get_users_page(
+    db: AsyncSession,
+    filters: UserFilter,
+    limit: int,
+    sort: str = "id",
+    descending: bool = False,
+    after: tuple | None = None,
+):
+    """Returns up to `limit` users after the (sort value, id) keyset `after`"""
+    column = USER_SORT_COLUMNS[sort]
+    query = select(User).where(*user_filters(filters))
+    if after is not None:
+        value, last_id = after
+        if sort == "id":
+            query = query.where(User.id < last_id if descending else User.id > last_id)
+        elif descending:
+            query = query.where(
+                or_(column < value, and_(column == value, User.id < last_id))
+            )
+        else:
+            query = query.where(
+                or_(column > value, and_(column == value, User.id > last_id))
+            )
+    if descending:
+        query = query.order_by(column.desc(), User.id.desc())
+    else:
+        query = query.order_by(column, User.id)
+    result = await db.scalars(query.limit(limit))
+    return result.all()
+
+
+async def count_users(db: AsyncSession, filters: UserFilter) -> tuple[int, int]:
+    """Returns the number of matching users and how many of them are active"""
+    total, active = (
+        await db.execute(
+            select(
+                func.count(User.id),
+                func.sum(case((User.is_active == True, 1), else_=0)),
+            ).where(*user_filters(filters))
+        )
+    ).one()
+    return total, active or 0
+
+
+async def get_admin_by_username(db: AsyncSession, username: str):
+    return await db.scalar(select(Admin).where(Admin.username == username))
+
+
+async def create_admin(db: AsyncSession, admin: AdminCreate):
+    hashed_password = await hash_password_async(admin.password)
+    new_admin = Admin(username=admin.username, password=hashed_password)
+    db.add(new_admin)
+    await db.commit()
+    await db.refresh(new_admin)
+    return new_admin
+
+
+async def update_admin(db: AsyncSession, existing_admin: Admin, admin: AdminCreate):
+    existing_admin.password = await hash_password_async(admin.password)
+
+    await db.commit()
+    await db.refresh(existing_admin)
+    return existing_admin
+
+
+async def get_user_by_name(db: AsyncSession, name: str):
+    return await db.scalar(select(User).where(User.name == name))
+
+
+async def get_user_by_uuid(db: AsyncSession, uuid: str):
+    return await db.scalar(select(User).where(User.uuid == uuid))
+
+
+async def create_user(db: AsyncSession, request: CreateUser, owner: str):
+    username = request.name.replace(" ", "_")
+
+    if await db.scalar(select(User).where(User.name == username)):
+        raise HTTPException(
+            status_code=400, detail="user with this name already exists"
+        )
+
+    new_user = User(
+        name=username, expiry_date=request.expiry_date, owner=owner, uuid=str(uuid4())
+    )
+
+    db.add(new_user)
+    # the node jobs are committed with the user, they can't get lost in between
+    await enqueue_node_jobs(db, username, "create")
+    await db.commit()
+    await db.refresh(new_user)
+    logger.info(f"user created successfully: {request.name}")
+    return new_user
+
+
+async def get_taken_user_keys(
+    db: AsyncSession, names: list[str], uuids: list[str]
+) -> tuple[set[str], set[str]]:
+    """Returns which of the given names and uuids already exist"""
+    taken_names = await db.scalars(select(User.name).where(User.name.in_(names)))
+    taken_uuids = await db.scalars(select(User.uuid).where(User.uuid.in_(uuids)))
+    return set(taken_names.all()), set(taken_uuids.all())
+
+
+async def insert_users(db: AsyncSession, rows: list[dict]):
+    """Inserts users with one executemany and queues them for every node"""
+    await db.execute(insert(User), rows)
+    await add_node_jobs_bulk(
+        db,
+        [
+            (row["name"], action)
+            for row in rows
+            for action in (
+                ("create",) if row["is_active"] else ("create", "deactivate")
+            )
+        ],
+    )
+    await db.commit()
+
+
+def _add_days(db: AsyncSession, days: int):
+    if db.bind.dialect.name == "sqlite":
+        return func.date(User.expiry_date, f"{days:+d} days", type_=Date)
+    return User.expiry_date + days
+
+
+async def bulk_extend_users(
+    db: AsyncSession,
+    conditions: list,
+    days: int | None = None,
+    expiry_date: date | None = None,
+) -> tuple[list[str], list[tuple[str, str]]]:
+    """Moves the expiry date of matching users, activating the ones not expired.
+
+    Returns the affected uuids and the (uuid, action) status changes.
+    """
+    new_expiry = literal(expiry_date, Date) if expiry_date else _add_days(db, days)
+    active = new_expiry >= date.today()
+    rows = (
+        await db.execute(
+            select(User.uuid, User.name, User.is_active, active).where(*conditions)
+        )
+    ).all()
+    await db.execute(
+        update(User)
+        .where(*conditions)
+        .values(expiry_date=new_expiry, is_active=active)
+        .execution_options(synchronize_session=False)
+    )
+    changes = [
+        (uuid, name, "activate" if now_active else "deactivate")
+        for uuid, name, was_active, now_active in rows
+        if bool(was_active) != bool(now_active)
+    ]
+    await add_node_jobs_bulk(db, [(name, action) for _, name, action in changes])
+    await db.commit()
+    return [row.uuid for row in rows], [(uuid, action) for uuid, _, action in changes]
+
+
+async def bulk_set_user_status(
+    db: AsyncSession, conditions: list, status: bool
+) -> list[str]:
+    """Enables or disables matching users, returns the uuids that changed"""
+    conditions = [*conditions, User.is_active != status]
+    rows = (await db.execute(select(User.uuid, User.name).where(*conditions))).all()
+    await db.execute(
+        update(User)
+        .where(*conditions)
+        .values(is_active=status)
+        .execution_options(synchronize_session=False)
+    )
+    await add_node_jobs_bulk(
+        db, [(row.name, "activate" if status else "deactivate") for row in rows]
+    )
+    await db.commit()
+    return [row.uuid for row in rows]
+
+
+async def expire_users(db: AsyncSession) -> list[str]:
+    """Deactivates every active user past the expiry date, returns their uuids"""
+    return await bulk_set_user_status(db, [User.expiry_date < date.today()], False)
+
+
+async def bulk_delete_users(db: AsyncSession, conditions: list) -> list[str]:
+    """Deletes matching users, returns their uuids"""
+    rows = (await db.execute(select(User.uuid, User.name).where(*conditions))).all()
+    await db.execute(
+        delete(User).where(*conditions).execution_options(synchronize_session=False)
+    )
+    await add_node_jobs_bulk(db, [(row.name, "delete") for row in rows])
+    await db.commit()
+    return [row.uuid for row in rows]
+
+
+async def stream_users(
+    db: AsyncSession, filters: UserFilter, batch_size: int
+) -> AsyncResult:
+    """Streams matching users from a server side cursor, oldest first"""
+    return await db.stream(
+        select(User.name, User.uuid, User.expiry_date, User.is_active, User.owner)
+        .where(*user_filters(filters))
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+
+async def update_user(db: AsyncSession, uuid: str, request: UpdateUser):
+    user = await db.scalar(select(User).where(User.uuid == uuid))
+    if not user:
+        raise HTTPException(status_code=404, detail="user not found on database")
+
+    was_active = user.is_active
+    if request.expiry_date >= datetime.today().date():
+        user.is_active = True
+    else:
+        user.is_active = False
+    user.expiry_date = request.expiry_date
+    if user.is_active != was_active:
+        await enqueue_node_jobs(
+            db, user.name, "activate" if user.is_active else "deactivate"
+        )
+
+    await db.commit()
+    await db.refresh(user)
+    return {"detail": "User updated successfully"}
+
+
+async def change_user_status(db: AsyncSession, uuid: str, status: bool) -> bool:
+    try:
+        user = await db.scalar(select(User).where(User.uuid == uuid))
+        user.is_active = status
+        await enqueue_node_jobs(db, user.name, "activate" if status else "deactivate")
+        await db.commit()
+        await db.refresh(user)
+        return True
+    except Exception as e:
+        logger.error(f"Error when change status for user:{uuid} on db: {e}")
+        return False
+
+
+async def get_upcoming_expiry_dates(db: AsyncSession, until: date) -> list[date]:
+    """Distinct expiry dates of active users before `until`, past ones included"""
+    result = await db.scalars(
+        select(User.expiry_date)
+        .where(User.is_active == True, User.expiry_date < until)
+        .distinct()
+    )
+    return result.all()
+
+
+async def delete_user(db: AsyncSession, name: str):
+    user = await db.scalar(select(User).where(User.name == name))
+    if not user:
+        raise HTTPException(status_code=404, detail="user not found on database")
+
+    await db.delete(user)
+    await enqueue_node_jobs(db, user.name, "delete")
+    await db.commit()
+
+
+# admins crud
+async def get_admins_with_stats(db: AsyncSession, soon: date):
+    """Returns (admin, users, active, expired, expiring soon) rows in one query"""
+    today = date.today()
+    result = await db.execute(
+        select(
+            Admin,
+            func.count(User.id),
+            func.coalesce(func.sum(case((User.is_active == True, 1), else_=0)), 0),
+            func.coalesce(func.sum(case((User.expiry_date < today, 1), else_=0)), 0),
+            func.coalesce(
+                func.sum(
+                    case(
+                        (
+                            and_(
+                                User.is_active == True,
+                                User.expiry_date >= today,
+                                User.expiry_date <= soon,
+                            ),
+                            1,
+                        ),
+                        else_=0,
+                    )
+                ),
+                0,
+            ),
+        )
+        .outerjoin(User, User.owner == Admin.username)
+        .group_by(Admin.id)
+        .order_by(Admin.id)
+    )
+    return result.all()
+
+
+async def it_is_admin(db: AsyncSession, username: str):
+    admin = await db.scalar(select(Admin).where(Admin.username == username))
+    if not admin:
+        return False
+    return admin
+
+
+async def delete_admin(db: AsyncSession, admin: Admin):
+    await db.delete(admin)
+    await db.commit()
+    return True
+
+
+# nodes crud
+async def get_all_nodes(db: AsyncSession):
+    result = await db.scalars(select(Node))
+    return result.all()
+
+
+async def get_node_by_id(db: AsyncSession, id: int):
+    return await db.scalar(select(Node).where(Node.id == id))
+
+
+async def get_node_by_name(db: AsyncSession, name: str):
+    return await db.scalar(select(Node).where(Node.name == name))
+
+
+async def create_node(db: AsyncSession, request: NodeCreate):
+    new_node = Node(
+        name=request.name,
+        address=request.address,
+        tunnel_address=request.tunnel_address,
+        ovpn_port=request.ovpn_port,
+        protocol=request.protocol,
+        port=request.port,
+        key=request.key,
+        status=request.status,
+    )
+
+    db.add(new_node)
+    await db.commit()
+    await db.refresh(new_node)
+    return new_node
+
+
+async def update_node(db: AsyncSession, node_id: int, request: NodeCreate):
+    node = await db.scalar(select(Node).where(Node.id == node_id))
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    node.name = request.name
+    node.tunnel_address = request.tunnel_address
+    node.ovpn_port = request.ovpn_port
+    node.protocol = request.protocol
+    node.port = request.port
+    node.key = request.key
+    node.status = request.status
+    await db.commit()
+    await db.refresh(node)
+    return node
+
+
+async def delete_node(db: AsyncSession, id: int):
+    node = await db.scalar(select(Node).where(Node.id == id))
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found")
+    await db.delete(node)
+    await db.execute(delete(NodeJob).where(NodeJob.node_id == id))
+    await db.commit()
+    return {"detail": "Node deleted successfully"}
+
+
+# settings crud
+async def get_settings(db: AsyncSession):
+    settings = await db.scalar(select(Settings))
+    if not settings:
+        settings = Settings(port=1194)
+        settings.protocol = "tcp"
+        db.add(settings)
+        await db.commit()
+        await db.refresh(settings)
+
+    return settings
+
+
+# node jobs crud
+def add_node_job(db: AsyncSession, node_id: int, user_name: str, action: str):
+    """Adds a job to the session, the caller commits"""
+    now = datetime.now()
+    db.add(
+        NodeJob(
+            node_id=node_id,
+            user_name=user_name,
+            action=action,
+            status="pending",
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now,
+        )
+    )
+
+
+async def add_node_jobs_bulk(db: AsyncSession, actions: list[tuple[str, str]]) -> int:
+    """Adds (user name, action) jobs for every node at once, the caller commits"""
+    if not actions:
+        return 0
+    now = datetime.now()
+    node_ids = (await db.scalars(select(Node.id))).all()
+    job_rows = [
+        {
+            "node_id": node_id,
+            "user_name": name,
+            "action": action,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+        for name, action in actions
+        for node_id in node_ids  # interleaved so a drain batch spans every node
+    ]
+    if job_rows:
+        await db.execute(insert(NodeJob), job_rows)
+    return len(job_rows)
+
+
+async def enqueue_node_jobs(db: AsyncSession, user_name: str, action: str) -> int:
+    """Queues an action for a user on every node, the caller commits it together
+    with the user change. Returns the number of jobs.
+    """
+    node_ids = (await db.scalars(select(Node.id))).all()
+    for node_id in node_ids:
+        add_node_job(db, node_id, user_name, action)
+    return len(node_ids)
+
+
+async def get_pending_job_users(db: AsyncSession, node_id: int) -> set[str]:
+    result = await db.scalars(
+        select(NodeJob.user_name)
+        .where(NodeJob.node_id == node_id, NodeJob.status == "pending")
+        .distinct()
+    )
+    return set(result.all())
+
+
+async def get_node_job_stats(db: AsyncSession) -> dict[int, tuple[int, int, str]]:
+    """Returns (pending, failed, last error) of the queued jobs for each node"""
+    last_errors = (
+        select(func.max(NodeJob.id))
+        .where(NodeJob.last_error.is_not(None))
+        .group_by(NodeJob.node_id)
+    )
+    counts = await db.execute(
+        select(
+            NodeJob.node_id,
+            func.sum(case((NodeJob.status == "pending", 1), else_=0)),
+            func.sum(case((NodeJob.status == "failed", 1), else_=0)),
+        ).group_by(NodeJob.node_id)
+    )
+    errors = await db.execute(
+        select(NodeJob.node_id, NodeJob.last_error).where(NodeJob.id.in_(last_errors))
+    )
+    last_error = dict(errors.all())
+    return {
+        node_id: (pending or 0, failed or 0, last_error.get(node_id))
+        for node_id, pending, failed in counts.all()
+    }
+
+
+async def get_due_node_jobs(db: AsyncSession, limit: int, claim_for: float):
+    """Claims and returns due jobs, only the oldest pending job of each user on
+    each node. Claimed jobs are skipped by other drains for `claim_for` seconds,
+    or until they are finished.
+    """
+    now = datetime.now()
+    heads = (
+        select(func.min(NodeJob.id))
+        .where(NodeJob.status == "pending")
+        .group_by(NodeJob.node_id, NodeJob.user_name)
+    )
+    due = await db.scalars(
+        select(NodeJob.id)
+        .where(NodeJob.id.in_(heads), NodeJob.next_attempt_at <= now)
+        .order_by(NodeJob.id)
+        .limit(limit)
+    )
+    ids = due.all()
+    if not ids:
+        return []
+    # the due check is repeated so a job claimed in between is not taken twice
+    claimed = await db.scalars(
+        update(NodeJob)
+        .where(NodeJob.id.in_(ids), NodeJob.next_attempt_at <= now)
+        .values(next_attempt_at=now + timedelta(seconds=claim_for))
+        .returning(NodeJob.id)
+        .execution_options(synchronize_session=False)
+    )
+    claimed_ids = claimed.all()
+    await db.commit()
+    result = await db.scalars(
+        select(NodeJob).where(NodeJob.id.in_(claimed_ids)).order_by(NodeJob.id)
+    )
+    return result.all()
+
+
+async def finish_node_jobs(
+    db: AsyncSession,
+    done: list[NodeJob],
+    failed: list[tuple[NodeJob, str, float]],
+    max_attempts: int,
+) -> list[NodeJob]:
+    """Removes finished jobs and reschedules failed ones after `delay` seconds.
+
+    Jobs deleted meanwhile, e.g. with their node, are skipped. Returns the jobs
+    that ran out of attempts.
+    """
+    if done:
+        await db.execute(
+            delete(NodeJob)
+            .where(NodeJob.id.in_([job.id for job in done]))
+            .execution_options(synchronize_session=False)
+        )
+    given_up = []
+    now = datetime.now()
+    for job, error, delay in failed:
+        values = {"attempts": job.attempts + 1, "last_error": error}
+        if job.attempts + 1 >= max_attempts:
+            # the failure time, failed jobs are dropped after a retention period
+            values.update(status="failed", next_attempt_at=now)
+        else:
+            values["next_attempt_at"] = now + timedelta(seconds=delay)
+        result = await db.execute(
+            update(NodeJob)
+            .where(NodeJob.id == job.id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount and "status" in values:
+            given_up.append(job)
+    await db.commit()
+    return given_up
+
+
+async def delete_failed_node_jobs(db: AsyncSession, before: datetime) -> int:
+    """Drops the jobs that failed for good before `before`, returns their number"""
+    result = await db.execute(
+        delete(NodeJob).where(
+            NodeJob.status == "failed", NodeJob.next_attempt_at < before
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def acquire_lease(db: AsyncSession, name: str, holder: str, ttl: int) -> bool:
+    """Takes the lease if it is free or expired, or renews it for its holder.
+
+    Returns whether `holder` owns the lease for the next `ttl` seconds.
+    """
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=ttl)
+    result = await db.execute(
+        update(SchedulerLease)
+        .where(
+            SchedulerLease.name == name,
+            or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now),
+        )
+        .values(holder=holder, expires_at=expires_at)
+    )
+    if result.rowcount:
+        await db.commit()
+        return True
+
+    # first run, or another worker holds the lease: the insert only goes through
+    # for the first worker creating the row
+    values = {"name": name, "holder": holder, "expires_at": expires_at}
+    dialect = db.bind.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        result = await db.execute(
+            dialect_insert(SchedulerLease).values(**values).on_conflict_do_nothing()
+        )
+        await db.commit()
+        return bool(result.rowcount)
+    try:
+        db.add(SchedulerLease(**values))
+        await db.commit()
+        return True
+    except IntegrityError:
+        await db.rollback()
+        return False
+
+
+async def release_lease(db: AsyncSession, name: str, holder: str):
+    await db.execute(
+        delete(SchedulerLease).where(
+            SchedulerLease.name == name, SchedulerLease.holder == holder
+        )
+    )
+    await db.commit()
+
+
+# scheduler runs crud
+async def start_job_run(
+    db: AsyncSession,
+    job_id: str,
+    trigger: str,
+    worker: str,
+    run_id: int | None = None,
+) -> int | None:
+    """Records a run as started and returns its id. With `run_id` the queued run
+    is started instead, None when another worker started it already.
+    """
+    now = datetime.now()
+    if run_id is not None:
+        result = await db.execute(
+            update(SchedulerRun)
+            .where(SchedulerRun.id == run_id, SchedulerRun.started_at.is_(None))
+            .values(started_at=now, worker=worker)
+        )
+        await db.commit()
+        return run_id if result.rowcount else None
+    run = SchedulerRun(job_id=job_id, trigger=trigger, worker=worker, started_at=now)
+    db.add(run)
+    await db.commit()
+    return run.id
+
+
+async def finish_job_run(
+    db: AsyncSession,
+    run_id: int,
+    duration: float,
+    items: int | None,
+    error: str | None,
+    keep: int,
+):
+    """Records the result of a run and drops the job's finished runs older than
+    its last `keep`
+    """
+    job_id = await db.scalar(
+        update(SchedulerRun)
+        .where(SchedulerRun.id == run_id)
+        .values(finished_at=datetime.now(), duration=duration, items=items, error=error)
+        .returning(SchedulerRun.job_id)
+    )
+    if job_id is None:
+        await db.commit()
+        return
+    finished = [SchedulerRun.job_id == job_id, SchedulerRun.finished_at.is_not(None)]
+    # queued runs start after newer ones, so runs are ordered by their start
+    oldest_kept = (
+        select(SchedulerRun.started_at)
+        .where(*finished)
+        .order_by(SchedulerRun.started_at.desc())
+        .offset(keep - 1)
+        .limit(1)
+        .scalar_subquery()
+    )
+    await db.execute(
+        delete(SchedulerRun).where(*finished, SchedulerRun.started_at < oldest_kept)
+    )
+    await db.commit()
+
+
+async def queue_job_run(db: AsyncSession, job_id: str) -> SchedulerRun:
+    """Queues a manual run for the worker holding the scheduler lease"""
+    run = SchedulerRun(job_id=job_id, trigger="manual")
+    db.add(run)
+    await db.commit()
+    await db.refresh(run)
+    return run
+
+
+async def get_queued_job_runs(db: AsyncSession):
+    result = await db.scalars(
+        select(SchedulerRun)
+        .where(SchedulerRun.started_at.is_(None))
+        .order_by(SchedulerRun.id)
+    )
+    return result.all()
+
+
+async def get_running_job_ids(db: AsyncSession) -> set[str]:
+    result = await db.scalars(
+        select(SchedulerRun.job_id)
+        .where(SchedulerRun.started_at.is_not(None), SchedulerRun.finished_at.is_(None))
+        .distinct()
+    )
+    return set(result.all())
+
+
+async def abandon_job_runs(db: AsyncSession, job_ids: list[str], worker: str) -> int:
+    """Closes runs of `job_ids` left unfinished by other workers, e.g. a leader that
+    died in the middle of a job. Returns the number of closed runs.
+    """
+    result = await db.execute(
+        update(SchedulerRun)
+        .where(
+            SchedulerRun.job_id.in_(job_ids),
+            SchedulerRun.started_at.is_not(None),
+            SchedulerRun.finished_at.is_(None),
+            SchedulerRun.worker != worker,
+        )
+        .values(finished_at=datetime.now(), error="worker stopped")
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def get_job_runs(db: AsyncSession, job_id: str | None, limit: int):
+    """Returns the recorded runs, queued ones first, then the newest"""
+    query = (
+        select(SchedulerRun)
+        .order_by(SchedulerRun.started_at.desc().nulls_first(), SchedulerRun.id.desc())
+        .limit(limit)
+    )
+    if job_id is not None:
+        query = query.where(SchedulerRun.job_id == job_id)
+    result = await db.scalars(query)
+    return result.all()
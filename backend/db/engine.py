@@ -1,15 +1,72 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from pathlib import Path
 
+from backend.config import config
+
 BASE_DIR = Path(__file__).resolve().parent
 
-DATABASE_URL = f"sqlite:///{BASE_DIR.parent.parent}/data/ov-panel.db"
-engin = create_engine(url=DATABASE_URL, connect_args={"check_same_thread": False})
+DATABASE_URL = make_url(
+    config.DATABASE_URL or f"sqlite:///{BASE_DIR.parent.parent}/data/ov-panel.db"
+)
+if DATABASE_URL.drivername in ("postgres", "postgresql"):
+    DATABASE_URL = DATABASE_URL.set(drivername="postgresql+psycopg")
+IS_SQLITE = DATABASE_URL.get_backend_name() == "sqlite"
+
+# used by the request handlers and background jobs, the sync engine
+# stays available for alembic and scripts
+if IS_SQLITE:
+    ASYNC_DATABASE_URL = DATABASE_URL.set(drivername="sqlite+aiosqlite")
+elif DATABASE_URL.get_backend_name() == "postgresql":
+    ASYNC_DATABASE_URL = DATABASE_URL.set(drivername="postgresql+psycopg")
+else:
+    ASYNC_DATABASE_URL = DATABASE_URL
+
+
+def pool_options() -> dict:
+    return {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Applies the tuned SQLite settings to every new connection"""
+    cursor = dbapi_connection.cursor()
+    if config.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT)}")
+    cursor.execute(f"PRAGMA cache_size={int(config.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA temp_store={config.SQLITE_TEMP_STORE}")
+    cursor.close()
+
+
+engin = create_engine(
+    url=DATABASE_URL,
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    poolclass=QueuePool,
+    **pool_options(),
+)
+async_engine = create_async_engine(
+    url=ASYNC_DATABASE_URL, poolclass=AsyncAdaptedQueuePool, **pool_options()
+)
+if IS_SQLITE:
+    event.listen(engin, "connect", set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
 
 Base = declarative_base()
 
 sessionLocal = sessionmaker(bind=engin, autoflush=False)
+asyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
 
 
 def get_db():
@@ -18,3 +75,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with asyncSessionLocal() as db:
+        yield db
@@ -1,17 +1,21 @@
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped, mapped_column
 from .engine import Base
-from datetime import date
+from datetime import date, datetime
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_is_active_expiry_date", "is_active", "expiry_date"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     uuid: Mapped[str] = mapped_column(unique=True, nullable=True)
     name: Mapped[str] = mapped_column(unique=True)
     expiry_date: Mapped[date]
     is_active: Mapped[bool] = mapped_column(default=True)
-    owner: Mapped[str] = mapped_column(nullable=False)
+    owner: Mapped[str] = mapped_column(nullable=False, index=True)
 
 
 class Admin(Base):
@@ -26,8 +30,8 @@ class Node(Base):
     __tablename__ = "nodes"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    name: Mapped[str] = mapped_column()
-    address: Mapped[str] = mapped_column()
+    name: Mapped[str] = mapped_column(index=True)
+    address: Mapped[str] = mapped_column(index=True)
     tunnel_address: Mapped[str] = mapped_column(nullable=True)
     protocol: Mapped[str] = mapped_column()
     ovpn_port: Mapped[int] = mapped_column()
@@ -43,3 +47,40 @@ class Settings(Base):
     tunnel_address: Mapped[str] = mapped_column(nullable=True)
     port: Mapped[int] = mapped_column(default=1194, nullable=False)
     protocol: Mapped[str] = mapped_column(default="tcp", nullable=False)
+
+
+class NodeJob(Base):
+    __tablename__ = "node_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    node_id: Mapped[int] = mapped_column(index=True)
+    user_name: Mapped[str] = mapped_column()
+    action: Mapped[str] = mapped_column()  # create, activate, deactivate, delete
+    status: Mapped[str] = mapped_column(default="pending")  # pending or failed
+    attempts: Mapped[int] = mapped_column(default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(index=True)
+    last_error: Mapped[str] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column()
+
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_lease"
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    holder: Mapped[str] = mapped_column()  # instance id of the leader
+    expires_at: Mapped[datetime] = mapped_column()
+
+
+class SchedulerRun(Base):
+    __tablename__ = "scheduler_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    job_id: Mapped[str] = mapped_column(index=True)
+    trigger: Mapped[str] = mapped_column()  # schedule, timer or manual
+    worker: Mapped[str] = mapped_column(nullable=True)  # instance id running it
+    # empty while a manual run waits for the leader
+    started_at: Mapped[datetime] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(nullable=True)
+    duration: Mapped[float] = mapped_column(nullable=True)  # in milliseconds
+    items: Mapped[int] = mapped_column(nullable=True)
+    error: Mapped[str] = mapped_column(nullable=True)
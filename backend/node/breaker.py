@@ -0,0 +1,77 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from backend.config import config
+from backend.schema.output import CircuitState
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because the node circuit is open."""
+
+
+class CircuitBreaker:
+    """Fails fast after repeated node failures and retries with exponential backoff."""
+
+    def __init__(
+        self,
+        failure_threshold: int = config.NODE_BREAKER_THRESHOLD,
+        base_delay: float = config.NODE_BREAKER_BASE_DELAY,
+        max_delay: float = config.NODE_BREAKER_MAX_DELAY,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = "closed"
+        self.failures = 0
+        self.open_count = 0
+        self.retry_at = 0.0
+
+    def allow_request(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() >= self.retry_at:
+            # let a single probe through, everything else keeps failing fast
+            self.state = "half_open"
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.open_count = 0
+
+    def release_probe(self):
+        """Lets the next request probe again when the probe ended without an answer."""
+        if self.state == "half_open":
+            self.state = "open"
+            self.retry_at = time.monotonic()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "open":
+            return  # requests sent before it opened, the backoff is already set
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            delay = min(self.max_delay, self.base_delay * 2**self.open_count)
+            self.retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+            self.open_count += 1
+            self.state = "open"
+
+    def snapshot(self) -> CircuitState:
+        retry_at = None
+        if self.state == "open":
+            retry_at = datetime.now() + timedelta(
+                seconds=max(0.0, self.retry_at - time.monotonic())
+            )
+        return CircuitState(state=self.state, failures=self.failures, retry_at=retry_at)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(address: str) -> CircuitBreaker:
+    """Returns the circuit breaker of a node, keyed by `address:port`."""
+    breaker = _breakers.get(address)
+    if breaker is None:
+        breaker = _breakers[address] = CircuitBreaker()
+    return breaker
@@ -0,0 +1,41 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from backend.config import config
+from backend.db.models import Node
+from backend.schema.output import NodeResult
+from .requests import NodeRequests
+
+
+NodeOperation = Callable[[Node, NodeRequests], Awaitable[bool]]
+
+
+async def run_on_nodes(
+    nodes: list[Node],
+    operation: NodeOperation,
+    concurrency: int | None = None,
+) -> list[NodeResult]:
+    """Runs an operation on every node in parallel and returns one result per node."""
+    semaphore = asyncio.Semaphore(concurrency or config.NODE_FANOUT_CONCURRENCY)
+
+    async def run(node: Node) -> NodeResult:
+        async with semaphore:
+            node_requests = NodeRequests(
+                address=node.address, port=node.port, api_key=node.key
+            )
+            started = time.perf_counter()
+            try:
+                success = await operation(node, node_requests)
+                error = None if success else node_requests.last_error
+            except Exception as e:
+                success, error = False, str(e)
+            return NodeResult(
+                node_id=node.id,
+                node_name=node.name,
+                success=success,
+                error=error,
+                latency=round((time.perf_counter() - started) * 1000, 2),
+            )
+
+    return list(await asyncio.gather(*(run(node) for node in nodes)))
@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import Callable
+
+from backend.db import async_crud
+from backend.db.engine import asyncSessionLocal
+from backend.logger import logger
+from backend.schema.output import NodeHealth
+from .fanout import run_on_nodes
+
+
+_health: dict[int, NodeHealth] = {}
+_listeners: list[Callable[[int, NodeHealth], None]] = []
+
+
+def get_node_health(node_id: int) -> NodeHealth | None:
+    """Returns the last probe result of a node, or None if it was never probed."""
+    return _health.get(node_id)
+
+
+def is_node_reachable(node_id: int) -> bool:
+    """Nodes that were not probed yet are treated as reachable."""
+    health = _health.get(node_id)
+    return health is None or health.reachable
+
+
+def on_status_change(listener: Callable[[int, NodeHealth], None]):
+    """Registers a callback fired whenever a node becomes reachable or unreachable."""
+    _listeners.append(listener)
+
+
+def record_node_health(node_id: int, health: NodeHealth):
+    previous = _health.get(node_id)
+    _health[node_id] = health
+    if previous is not None and previous.reachable == health.reachable:
+        return
+
+    for listener in _listeners:
+        try:
+            listener(node_id, health)
+        except Exception as e:
+            logger.error(f"Error in node status listener for node {node_id}: {e}")
+
+
+def forget_node(node_id: int):
+    _health.pop(node_id, None)
+
+
+async def probe_nodes() -> int:
+    """Checks every enabled node and refreshes the cached health state"""
+    async with asyncSessionLocal() as db:
+        nodes = [node for node in await async_crud.get_all_nodes(db) if node.status]
+
+    async def check(node, node_requests) -> bool:
+        return await node_requests.check_node()
+
+    results = await run_on_nodes(nodes, check)
+    checked_at = datetime.now()
+    for result in results:
+        previous = _health.get(result.node_id)
+        if previous and previous.reachable != result.success:
+            logger.warning(
+                f"Node {result.node_name} is now "
+                f"{'reachable' if result.success else 'unreachable'}"
+            )
+        record_node_health(
+            result.node_id,
+            NodeHealth(
+                reachable=result.success,
+                latency=result.latency,
+                last_error=result.error,
+                checked_at=checked_at,
+            ),
+        )
+
+    probed = {node.id for node in nodes}
+    for node_id in list(_health):
+        if node_id not in probed:
+            forget_node(node_id)
+    return len(nodes)
@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from backend.config import config
+from backend.db import async_crud
+from backend.db.engine import asyncSessionLocal
+from backend.db.models import Node, NodeJob
+from backend.logger import logger
+from backend.operations.leader import is_leader, on_leadership_change
+from backend.schema.output import BatchItemResult
+from .requests import NodeRequests
+
+
+_wakeup = asyncio.Event()
+_worker: asyncio.Task | None = None
+# the worker and callers waiting for their jobs must not pick the same jobs
+_drain_lock = asyncio.Lock()
+
+
+def notify_outbox():
+    """Wakes the worker up so newly queued jobs don't wait for the next poll."""
+    _wakeup.set()
+
+
+async def _run_node_jobs(node: Node, jobs: list[NodeJob]) -> list[BatchItemResult]:
+    node_requests = NodeRequests(address=node.address, port=node.port, api_key=node.key)
+    return await node_requests.run_actions(
+        [{"action": job.action, "name": f"{job.user_name}-{node.name}"} for job in jobs]
+    )
+
+
+async def drain_outbox() -> int:
+    """Runs every due job once and returns the number of processed jobs"""
+    processed = 0
+    async with _drain_lock, asyncSessionLocal() as db:
+        while True:
+            jobs = await async_crud.get_due_node_jobs(
+                db, config.NODE_JOB_BATCH_SIZE, config.NODE_JOB_CLAIM_TIMEOUT
+            )
+            if not jobs:
+                break
+            nodes = {node.id: node for node in await async_crud.get_all_nodes(db)}
+            jobs_by_node: dict[int, list[NodeJob]] = {}
+            for job in jobs:
+                jobs_by_node.setdefault(job.node_id, []).append(job)
+            semaphore = asyncio.Semaphore(config.NODE_JOB_WORKERS)
+
+            async def run(node_id: int, node_jobs: list[NodeJob]):
+                node = nodes.get(node_id)
+                if node is None:
+                    # node was removed, nothing left to sync
+                    return [(job, True, None) for job in node_jobs]
+                async with semaphore:
+                    results = await _run_node_jobs(node, node_jobs)
+                return [
+                    (job, result.success, result.error)
+                    for job, result in zip(node_jobs, results)
+                ]
+
+            batches = await asyncio.gather(
+                *(
+                    run(node_id, node_jobs)
+                    for node_id, node_jobs in jobs_by_node.items()
+                )
+            )
+            done, failed = [], []
+            for job, success, error in (item for batch in batches for item in batch):
+                if success:
+                    done.append(job)
+                    continue
+                delay = min(
+                    config.NODE_JOB_MAX_DELAY,
+                    config.NODE_JOB_BASE_DELAY * 2**job.attempts,
+                )
+                failed.append((job, error or "", delay))
+            given_up = await async_crud.finish_node_jobs(
+                db, done, failed, config.NODE_JOB_MAX_ATTEMPTS
+            )
+            errors = {job.id: error for job, error, _ in failed}
+            for job in given_up:
+                logger.error(
+                    f"Giving up on node job {job.id} ({job.action} '{job.user_name}') "
+                    f"after {job.attempts + 1} attempts: {errors[job.id]}"
+                )
+            processed += len(jobs)
+    return processed
+
+
+async def _prune_failed_jobs():
+    before = datetime.now() - timedelta(seconds=config.NODE_JOB_FAILED_RETENTION)
+    async with asyncSessionLocal() as db:
+        pruned = await async_crud.delete_failed_node_jobs(db, before)
+    if pruned:
+        logger.info(f"Dropped {pruned} node jobs that failed before {before}")
+
+
+async def _run_worker():
+    while True:
+        _wakeup.clear()
+        try:
+            await drain_outbox()
+        except Exception as e:
+            logger.error(f"Error while draining node jobs: {e}")
+        if is_leader():
+            try:
+                await _prune_failed_jobs()
+            except Exception as e:
+                logger.error(f"Error while pruning failed node jobs: {e}")
+        # every worker drains the jobs it queued right away, jobs are claimed so
+        # workers never run the same one, only the leader polls for retries
+        timeout = config.NODE_JOB_POLL_INTERVAL if is_leader() else None
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _on_leadership_change(leader: bool):
+    if leader:
+        notify_outbox()
+
+
+def start_outbox_worker():
+    global _worker
+    if _worker is None or _worker.done():
+        _worker = asyncio.create_task(_run_worker())
+
+
+async def stop_outbox_worker():
+    global _worker
+    if _worker is not None:
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+        _worker = None
+
+
+on_leadership_change(_on_leadership_change)
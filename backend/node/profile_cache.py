@@ -0,0 +1,161 @@
+import hashlib
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from backend.config import config
+from backend.logger import logger
+
+
+@dataclass
+class CachedProfile:
+    path: str
+    size: int
+    etag: str
+    version: str | None  # version reported by the node, used to revalidate
+    stored_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.stored_at < config.PROFILE_CACHE_TTL
+
+
+class ProfileCache:
+    """Size-bounded LRU cache of .ovpn profiles on disk, keyed by (user uuid, node id)."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries: OrderedDict[tuple[str, int], CachedProfile] = OrderedDict()
+
+    def load(self):
+        """Creates the cache directory and indexes its files, called on startup."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.entries.clear()
+        self.total_bytes = 0
+        self._load()
+
+    def _path(self, uuid: str, node_id: int) -> str:
+        return os.path.join(self.directory, f"{uuid}_{node_id}.ovpn")
+
+    def _load(self):
+        """Rebuilds the index from files left by a previous run, oldest first."""
+        files = []
+        for filename in os.listdir(self.directory):
+            uuid, _, node_id = filename.removesuffix(".ovpn").rpartition("_")
+            if not filename.endswith(".ovpn") or not node_id.isdigit():
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                files.append((os.path.getmtime(path), uuid, int(node_id), path))
+            except FileNotFoundError:
+                continue  # removed by another worker
+
+        for stored_at, uuid, node_id, path in sorted(files):
+            try:
+                with open(path, "rb") as f:
+                    etag = _etag(f.read())
+                self._add((uuid, node_id), path, etag, None, stored_at)
+            except FileNotFoundError:
+                continue
+        self._evict()
+
+    def _add(self, key, path: str, etag: str, version: str | None, stored_at: float):
+        size = os.path.getsize(path)
+        self.entries[key] = CachedProfile(path, size, etag, version, stored_at)
+        self.total_bytes += size
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            _, entry = self.entries.popitem(last=False)
+            self._remove_file(entry)
+
+    def _remove_file(self, entry: CachedProfile):
+        self.total_bytes -= entry.size
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, uuid: str, node_id: int) -> CachedProfile | None:
+        entry = self.entries.get((uuid, node_id))
+        if entry is None:
+            return None
+        # the index is per process, other workers may have removed the file
+        if not os.path.exists(entry.path):
+            self.discard(uuid, node_id)
+            return None
+        self.entries.move_to_end((uuid, node_id))
+        return entry
+
+    def open(self, uuid: str, node_id: int) -> BinaryIO | None:
+        """Opens a cached profile for reading, None when it is gone from the disk.
+
+        An open file stays readable even if the profile is removed meanwhile.
+        """
+        entry = self.get(uuid, node_id)
+        if entry is None:
+            return None
+        try:
+            return open(entry.path, "rb")
+        except FileNotFoundError:
+            self.discard(uuid, node_id)
+            return None
+
+    def touch(self, uuid: str, node_id: int):
+        """Marks an entry as fresh again after the node confirmed it is unchanged."""
+        entry = self.get(uuid, node_id)
+        if entry is not None:
+            entry.stored_at = time.time()
+
+    def temp_file(self) -> tuple[int, str]:
+        """Opens a temporary file in the cache directory for a download in progress."""
+        return tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+
+    def put_file(
+        self,
+        uuid: str,
+        node_id: int,
+        temp_path: str,
+        etag: str,
+        version: str | None = None,
+    ) -> CachedProfile:
+        """Moves a completed temporary file into the cache."""
+        key = (uuid, node_id)
+        self.discard(uuid, node_id)
+        path = self._path(uuid, node_id)
+        os.replace(temp_path, path)
+        self._add(key, path, etag, version, time.time())
+        self._evict()
+        return self.entries.get(key)
+
+    def discard(self, uuid: str, node_id: int):
+        entry = self.entries.pop((uuid, node_id), None)
+        if entry is not None:
+            self._remove_file(entry)
+
+    def invalidate_user(self, uuid: str):
+        for key in [key for key in self.entries if key[0] == uuid]:
+            self.discard(*key)
+
+    def invalidate_node(self, node_id: int):
+        for key in [key for key in self.entries if key[1] == node_id]:
+            self.discard(*key)
+        logger.info(f"Profile cache cleared for node {node_id}")
+
+
+def _etag(content: bytes) -> str:
+    return profile_etag(hashlib.sha256(content))
+
+
+def profile_etag(digest) -> str:
+    """Builds the ETag of a profile from its sha256 digest."""
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+# loaded by the startup event, building it touches the disk
+profile_cache = ProfileCache(config.PROFILE_CACHE_DIR, config.PROFILE_CACHE_MAX_BYTES)
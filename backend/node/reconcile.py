@@ -0,0 +1,119 @@
+from datetime import date
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db import async_crud
+from backend.db.engine import asyncSessionLocal
+from backend.db.models import Node
+from backend.logger import logger
+from backend.schema._input import CreateUser
+from backend.schema.output import ReconcileResult
+from .health import is_node_reachable
+from .outbox import notify_outbox
+from .requests import NodeRequests
+
+
+def is_panel_name(name: str) -> bool:
+    """Whether the panel can have created a user with this name"""
+    if " " in name:
+        return False  # the panel replaces spaces with underscores
+    try:
+        CreateUser(name=name, expiry_date=date.today())
+    except ValidationError:
+        return False
+    return True
+
+
+async def reconcile_node(
+    node: Node, db: AsyncSession, dry_run: bool = False
+) -> ReconcileResult:
+    """Diffs a node's clients against the panel users and queues the missing changes"""
+    result = ReconcileResult(node_id=node.id, node_name=node.name)
+    if not node.status or not is_node_reachable(node.id):
+        result.skipped = True
+        return result
+
+    node_requests = NodeRequests(address=node.address, port=node.port, api_key=node.key)
+    clients = await node_requests.list_users()
+    if clients is None:
+        result.error = node_requests.last_error
+        return result
+
+    # read after the node answered, in a new transaction, so users changed
+    # meanwhile are diffed as they are now. A user change and its jobs are
+    # committed together, reading the users first can't miss a change's jobs.
+    await db.commit()
+    desired = await async_crud.get_user_states(db)
+    # users with queued jobs are already converging, leave them to the outbox
+    pending = await async_crud.get_pending_job_users(db, node.id)
+    suffix = f"-{node.name}"
+    actual = {
+        name[: -len(suffix)]: active
+        for name, active in clients.items()
+        if name.endswith(suffix)
+    }
+
+    for name, active in desired.items():
+        if name in pending:
+            continue
+        if name not in actual:
+            result.create.append(name)
+            if not active:
+                result.deactivate.append(name)
+        elif actual[name] != active:
+            (result.activate if active else result.deactivate).append(name)
+    # clients the panel can't have created are reported but never deleted
+    unknown = [name for name in actual if name not in desired and name not in pending]
+    result.delete = [name for name in unknown if is_panel_name(name)]
+    result.unmanaged = [
+        f"{name}{suffix}" for name in unknown if not is_panel_name(name)
+    ]
+    result.unmanaged += [name for name in clients if not name.endswith(suffix)]
+
+    if not dry_run:
+        for action in ("create", "activate", "deactivate", "delete"):
+            for name in getattr(result, action):
+                async_crud.add_node_job(db, node.id, name, action)
+        await db.commit()
+    return result
+
+
+async def reconcile_nodes(
+    db: AsyncSession, node_id: int | None = None, dry_run: bool = False
+) -> list[ReconcileResult]:
+    """Reconciles one node, or every node when node_id is None"""
+    nodes = await async_crud.get_all_nodes(db)
+    if node_id is not None:
+        nodes = [node for node in nodes if node.id == node_id]
+
+    results = []
+    for node in nodes:
+        result = await reconcile_node(node, db, dry_run)
+        changes = sum(
+            len(getattr(result, action))
+            for action in ("create", "activate", "deactivate", "delete")
+        )
+        if changes:
+            logger.info(
+                f"Reconcile {'plan' if dry_run else 'queued'} for node {node.name}: "
+                f"{changes} changes"
+            )
+        results.append(result)
+
+    if not dry_run:
+        notify_outbox()
+    return results
+
+
+async def reconcile_all_nodes() -> int:
+    """Scheduled reconciliation of every node, returns the number of queued changes"""
+    async with asyncSessionLocal() as db:
+        results = await reconcile_nodes(db)
+    return sum(
+        len(result.create)
+        + len(result.activate)
+        + len(result.deactivate)
+        + len(result.delete)
+        for result in results
+    )
@@ -1,6 +1,41 @@
-import requests
-from fastapi.responses import Response
+import asyncio
+import time
+
+import httpx
+
+from backend.config import config
 from backend.logger import logger
+from backend.schema.output import BatchItemResult
+from .breaker import CircuitOpenError, get_breaker
+
+
+_clients: dict[str, httpx.AsyncClient] = {}
+_batch_unsupported: set[str] = set()
+# earliest time each node may receive the next batch under NODE_ACTIONS_PER_SECOND
+_next_batch_at: dict[str, float] = {}
+
+
+def get_client(address: str) -> httpx.AsyncClient:
+    """Returns the shared keep-alive client for a node, creating it on first use."""
+    client = _clients.get(address)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=f"http://{address}",
+            limits=httpx.Limits(
+                max_connections=config.NODE_MAX_CONNECTIONS,
+                max_keepalive_connections=config.NODE_MAX_CONNECTIONS,
+                keepalive_expiry=config.NODE_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _clients[address] = client
+    return client
+
+
+async def close_clients():
+    """Closes every pooled node client, called on application shutdown."""
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
 
 
 class NodeRequests:
@@ -22,10 +57,42 @@ class NodeRequests:
         self.protocol = protocol
         self.ovpn_port = ovpn_port
         self.set_new_setting = set_new_setting
+        self.client = get_client(self.address)
+        self.breaker = get_breaker(self.address)
+        self.last_error: str | None = None
 
-    def check_node(self) -> bool:
+    def _error(self, message: str) -> None:
+        self.last_error = message
+        logger.error(message)
+
+    async def _request(
+        self, method: str, path: str, timeout: float, stream: bool = False, **kwargs
+    ) -> httpx.Response:
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("circuit is open, node is failing")
+        kwargs.setdefault("headers", self.headers)
+        try:
+            request = self.client.build_request(method, path, timeout=timeout, **kwargs)
+            response = await self.client.send(request, stream=stream)
+        except asyncio.CancelledError:
+            # the caller went away, that says nothing about the node
+            self.breaker.release_probe()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def _post(self, path: str, data: dict, timeout: float) -> dict:
+        response = await self._request("POST", path, timeout, json=data)
+        return response.json()
+
+    async def check_node(self) -> bool:
         """Checks the node status and sets new settings if necesary."""
-        api = f"http://{self.address}/sync/get-status"
         try:
             data = {
                 "tunnel_address": self.tunnel_address,
@@ -33,20 +100,19 @@ class NodeRequests:
                 "ovpn_port": self.ovpn_port,
                 "set_new_setting": self.set_new_setting,
             }
-            response = requests.post(
-                api, headers=self.headers, json=data, timeout=5
-            ).json()
+            response = await self._post(
+                "/sync/get-status", data, timeout=config.NODE_TIMEOUT_STATUS
+            )
             if response.get("success"):
                 return True
             else:
-                logger.error(f"Node {self.address} is not reachable")
+                self._error(f"Node {self.address} is not reachable")
                 return False
         except Exception as e:
-            logger.error(f"Error checking node {self.address}: {e}")
+            self._error(f"Error checking node {self.address}: {e}")
             return False
 
-    def get_node_info(self) -> dict:
-        api = f"http://{self.address}/sync/get-status"
+    async def get_node_info(self) -> dict:
         try:
             data = {
                 "tunnel_address": self.tunnel_address,
@@ -54,87 +120,208 @@ class NodeRequests:
                 "ovpn_port": self.ovpn_port,
                 "set_new_setting": self.set_new_setting,
             }
-            response = requests.post(
-                api, headers=self.headers, json=data, timeout=10
-            ).json()
+            response = await self._post(
+                "/sync/get-status", data, timeout=config.NODE_TIMEOUT_INFO
+            )
             if response.get("success"):
                 return response.get("data")
             else:
-                logger.error(
+                self._error(
                     f"Failed to get node info on {self.address}: {response.get('msg')}"
                 )
                 return {}
         except Exception as e:
-            logger.error(f"Error getting node info on {self.address}: {e}")
+            self._error(f"Error getting node info on {self.address}: {e}")
             return {}
 
-    def create_user(self, name: str) -> bool:
-        api = f"http://{self.address}/sync/create-user"
+    async def create_user(self, name: str) -> bool:
         data = {"name": name}
         try:
-            response = requests.post(
-                api, headers=self.headers, json=data, timeout=25
-            ).json()
+            response = await self._post(
+                "/sync/create-user", data, timeout=config.NODE_TIMEOUT_CREATE
+            )
             if response.get("success"):
                 return True
             else:
-                logger.error(
+                self._error(
                     f"Failed to create user on node {self.address}: {response.get('msg')}"
                 )
                 return False
         except Exception as e:
-            logger.error(f"Error creating user on node {self.address}: {e}")
+            self._error(f"Error creating user on node {self.address}: {e}")
             return False
 
-    def change_user_status(self, name, status):
-        api = f"http://{self.address}/sync/change-user-status"
+    async def change_user_status(self, name, status):
         try:
             data = {"name": name, "status": "activate" if status else "deactivate"}
-            response = requests.post(
-                api, headers=self.headers, json=data, timeout=10
-            ).json()
+            response = await self._post(
+                "/sync/change-user-status",
+                data,
+                timeout=config.NODE_TIMEOUT_CHANGE_STATUS,
+            )
 
             if response.get("success"):
                 return True
             else:
-                logger.error(
+                self._error(
                     f"Failed to change user status on node {self.address}: {response.get('msg')}"
                 )
                 return False
         except Exception as e:
-            logger.error(f"Error change user status on node {self.address}: {e}")
+            self._error(f"Error change user status on node {self.address}: {e}")
             return False
 
-    def download_ovpn_client(self, name: str) -> Response:
-        api = f"http://{self.address}/sync/download/ovpn/{name}"
+    async def open_ovpn_stream(
+        self, name: str, version: str | None = None
+    ) -> httpx.Response | None:
+        """Opens a streamed profile download, the caller must close the response.
+
+        A 304 response means `version` is still the current profile.
+        """
+        headers = {"If-None-Match": version} if version else {}
+        try:
+            response = await self._request(
+                "GET",
+                f"/sync/download/ovpn/{name}",
+                config.NODE_TIMEOUT_DOWNLOAD,
+                stream=True,
+                headers={**self.headers, **headers},
+            )
+            if response.status_code in (200, 304):
+                return response
+            await response.aclose()
+            self._error(
+                f"Failed to download OVPN client from node {self.address}: "
+                f"status {response.status_code}"
+            )
+        except Exception as e:
+            self._error(f"Error downloading OVPN client from node {self.address}: {e}")
+        return None
+
+    async def list_users(self) -> dict[str, bool] | None:
+        """Returns the node's clients as {name: is_active}, None on failure."""
         try:
-            response = requests.get(api, headers=self.headers, timeout=25)
-            if response.status_code == 200:
-                return Response(
-                    content=response.content,
-                    media_type="application/x-openvpn-profile",
-                    headers={
-                        "Content-Disposition": f"attachment; filename={name}.ovpn"
-                    },
+            response = await self._request(
+                "GET", "/sync/list-users", config.NODE_TIMEOUT_INFO
+            )
+            data = response.json()
+            if data.get("success"):
+                return {
+                    client["name"]: bool(client.get("active", True))
+                    for client in data.get("data") or []
+                }
+            else:
+                self._error(
+                    f"Failed to list users on node {self.address}: {data.get('msg')}"
                 )
         except Exception as e:
-            logger.error(f"Error downloading OVPN client from node {self.address}: {e}")
+            self._error(f"Error listing users on node {self.address}: {e}")
         return None
 
-    def delete_user(self, name: str) -> bool:
-        api = f"http://{self.address}/sync/delete-user"
+    async def batch(self, actions: list[dict]) -> list[BatchItemResult] | None:
+        """Sends many user actions in one request, returns a result for each item.
+
+        Each action is {"action": create|activate|deactivate|delete, "name": ...}.
+        """
+        try:
+            response = await self._request(
+                "POST",
+                "/sync/batch",
+                config.NODE_TIMEOUT_BATCH,
+                json={"actions": actions},
+            )
+            if response.status_code == 404:
+                _batch_unsupported.add(self.address)
+                self._error(f"Node {self.address} does not support batch requests")
+                return None
+            data = response.json()
+            if data.get("success"):
+                items = data.get("data") or []
+                items += [{"msg": "missing from batch response"}] * (
+                    len(actions) - len(items)
+                )
+                return [
+                    BatchItemResult(
+                        name=action["name"],
+                        action=action["action"],
+                        success=bool(item.get("success")),
+                        error=None if item.get("success") else item.get("msg"),
+                    )
+                    for action, item in zip(actions, items)
+                ]
+            else:
+                self._error(
+                    f"Failed to run batch on node {self.address}: {data.get('msg')}"
+                )
+        except Exception as e:
+            self._error(f"Error running batch on node {self.address}: {e}")
+        return None
+
+    async def _pace(self, count: int):
+        """Waits until the node may take `count` more actions under the rate limit."""
+        now = time.monotonic()
+        start_at = max(now, _next_batch_at.get(self.address, now))
+        _next_batch_at[self.address] = start_at + count / config.NODE_ACTIONS_PER_SECOND
+        await asyncio.sleep(start_at - now)
+
+    async def run_actions(self, actions: list[dict]) -> list[BatchItemResult]:
+        """Runs user actions in batches, one by one on nodes without batch support."""
+        results = []
+        for start in range(0, len(actions), config.NODE_BATCH_SIZE):
+            chunk = actions[start : start + config.NODE_BATCH_SIZE]
+            if config.NODE_ACTIONS_PER_SECOND > 0:
+                await self._pace(len(chunk))
+            if self.address not in _batch_unsupported:
+                chunk_results = await self.batch(chunk)
+                if chunk_results is None and self.address not in _batch_unsupported:
+                    chunk_results = [
+                        BatchItemResult(
+                            name=action["name"],
+                            action=action["action"],
+                            success=False,
+                            error=self.last_error,
+                        )
+                        for action in chunk
+                    ]
+                if chunk_results is not None:
+                    results.extend(chunk_results)
+                    continue
+
+            for action in chunk:
+                self.last_error = None
+                if action["action"] == "create":
+                    success = await self.create_user(action["name"])
+                elif action["action"] in ("activate", "deactivate"):
+                    success = await self.change_user_status(
+                        action["name"], action["action"] == "activate"
+                    )
+                elif action["action"] == "delete":
+                    success = await self.delete_user(action["name"])
+                else:
+                    success, self.last_error = False, "unknown action"
+                results.append(
+                    BatchItemResult(
+                        name=action["name"],
+                        action=action["action"],
+                        success=success,
+                        error=None if success else self.last_error,
+                    )
+                )
+        return results
+
+    async def delete_user(self, name: str) -> bool:
         data = {"name": name}
         try:
-            response = requests.post(
-                api, headers=self.headers, json=data, timeout=25
-            ).json()
+            response = await self._post(
+                "/sync/delete-user", data, timeout=config.NODE_TIMEOUT_DELETE
+            )
             if response.get("success"):
                 return True
             else:
-                logger.error(
+                self._error(
                     f"Failed to delete user on node {self.address}: {response.get('msg')}"
                 )
                 return False
         except Exception as e:
-            logger.error(f"Error deleting user on node {self.address}: {e}")
+            self._error(f"Error deleting user on node {self.address}: {e}")
             return False
@@ -1,13 +1,28 @@
-from fastapi.responses import Response
-from sqlalchemy.orm import Session
+import asyncio
+import hashlib
+import io
+import os
+import zipfile
+from typing import BinaryIO
 
+import httpx
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import config
 from backend.logger import logger
 from backend.schema._input import NodeCreate
+from backend.schema.output import NodeJobStats
 from .requests import NodeRequests
-from backend.db import crud
+from .health import get_node_health, forget_node, is_node_reachable
+from .breaker import get_breaker
+from .profile_cache import profile_cache, profile_etag
+from backend.db import async_crud
+from backend.db.engine import asyncSessionLocal
+from backend.operations.sub_cache import invalidate_all_subscriptions
 
 
-async def add_node_handler(request: NodeCreate, db: Session) -> bool:
+async def add_node_handler(request: NodeCreate, db: AsyncSession) -> bool:
     new_node = NodeRequests(
         request.address,
         request.port,
@@ -17,8 +32,9 @@ async def add_node_handler(request: NodeCreate, db: Session) -> bool:
         request.ovpn_port,
         request.set_new_setting,
     )
-    if new_node.check_node():
-        crud.create_node(db, request)
+    if await new_node.check_node():
+        await async_crud.create_node(db, request)
+        invalidate_all_subscriptions()
         logger.info(f"Node added successfully: {request.address}:{request.port}")
         return True
     else:
@@ -26,10 +42,14 @@ async def add_node_handler(request: NodeCreate, db: Session) -> bool:
         return False
 
 
-async def update_node_handler(node_id: int, request: NodeCreate, db: Session) -> bool:
+async def update_node_handler(
+    node_id: int, request: NodeCreate, db: AsyncSession
+) -> bool:
     """Update a node"""
-    crud.update_node(db, node_id, request)
-    restart_node = NodeRequests(
+    await async_crud.update_node(db, node_id, request)
+    profile_cache.invalidate_node(node_id)
+    invalidate_all_subscriptions()
+    restart_node = await NodeRequests(
         address=request.address,
         port=request.port,
         api_key=request.key,
@@ -43,11 +63,14 @@ async def update_node_handler(node_id: int, request: NodeCreate, db: Session) ->
     return restart_node
 
 
-async def delete_node_handler(node_id: int, db: Session) -> bool:
+async def delete_node_handler(node_id: int, db: AsyncSession) -> bool:
     """Delete a node"""
-    node = crud.get_node_by_id(db, node_id)
+    node = await async_crud.get_node_by_id(db, node_id)
     if node:
-        crud.delete_node(db, node.id)
+        await async_crud.delete_node(db, node.id)
+        forget_node(node.id)
+        profile_cache.invalidate_node(node.id)
+        invalidate_all_subscriptions()
         logger.info(f"Node deleted successfully: {node.name}")
         return True
     else:
@@ -55,11 +78,13 @@ async def delete_node_handler(node_id: int, db: Session) -> bool:
         return False
 
 
-async def list_nodes_handler(db: Session) -> list:
+async def list_nodes_handler(db: AsyncSession) -> list:
     """Retrieve all nodes"""
     nodes_list = []
-    nodes = crud.get_all_nodes(db)
+    nodes = await async_crud.get_all_nodes(db)
+    job_stats = await async_crud.get_node_job_stats(db)
     for node in nodes:
+        pending, failed, last_error = job_stats.get(node.id, (0, 0, None))
         node_info = {
             "id": node.id,
             "name": node.name,
@@ -69,16 +94,19 @@ async def list_nodes_handler(db: Session) -> list:
             "protocol": node.protocol,
             "port": node.port,
             "status": "active" if node.status else "inactive",
+            "health": get_node_health(node.id),
+            "circuit": get_breaker(f"{node.address}:{node.port}").snapshot(),
+            "jobs": NodeJobStats(pending=pending, failed=failed, last_error=last_error),
         }
         nodes_list.append(node_info)
     return nodes_list
 
 
-async def get_node_status_handler(node_id: int, db: Session):
+async def get_node_status_handler(node_id: int, db: AsyncSession):
     """Get the status of a node"""
-    node = crud.get_node_by_id(db, node_id)
+    node = await async_crud.get_node_by_id(db, node_id)
     if node:
-        node_status = NodeRequests(
+        node_status = await NodeRequests(
             address=node.address, port=node.port, api_key=node.key
         ).get_node_info()
         print(node_status)
@@ -91,85 +119,198 @@ async def get_node_status_handler(node_id: int, db: Session):
     return None
 
 
-async def create_user_on_all_nodes(name: str, db: Session):
-    """Create a user on all nodes"""
-    nodes = crud.get_all_nodes(db)
-    if nodes:
-        for node in nodes:
-            node_requests = NodeRequests(
-                address=node.address, port=node.port, api_key=node.key
-            )
-            node_status = node_requests.check_node()
-            if node_status:
-                node_requests.create_user(f"{name}-{node.name}")
-                logger.info(
-                    f"User '{name}-{node.name}' created on node {node.address}:{node.port}"
-                )
-            else:
-                logger.warning(
-                    f"Failed to create user '{name}-{node.name}' on node {node.address}:{node.port}"
-                )
-
-
-async def change_user_status_on_all_nodes(
-    uuid: str, name: str, status: bool, db: Session
-):
-    nodes = crud.get_all_nodes(db)
-    crud.change_user_status(db, uuid, status)
+async def download_ovpn_client_from_node(
+    uuid: str, node_id: int, db: AsyncSession, if_none_match: str | None = None
+) -> Response | None:
+    """Download OVPN client from a node, served from the profile cache when possible"""
+    node = await async_crud.get_node_by_id(db, node_id)
+    user = await async_crud.get_user_by_uuid(db, uuid)
+    if not node or not user:
+        return None
+
+    profile = await _open_profile(user, node)
+    if profile is None:
+        return None
+    source, etag = profile
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match == etag:
+        source.close()
+        return Response(status_code=304, headers=headers)
+    return StreamingResponse(
+        _read_file(source),
+        media_type="application/x-openvpn-profile",
+        headers={
+            **headers,
+            "Content-Disposition": f"attachment; filename={user.name}-{node.name}.ovpn",
+            "Content-Length": str(os.fstat(source.fileno()).st_size),
+        },
+    )
+
+
+async def _open_profile(user, node) -> tuple[BinaryIO, str] | None:
+    """Opens the user's profile on a node with its ETag, through the profile cache.
 
-    if nodes:
-        for node in nodes:
-            node_request = NodeRequests(
-                address=node.address, port=node.port, api_key=node.key
+    A stale copy is served when the node fails.
+    """
+    name = f"{user.name}-{node.name}"
+    cached = profile_cache.get(user.uuid, node.id)
+    if cached is None or not cached.fresh:
+        response = await NodeRequests(
+            address=node.address, port=node.port, api_key=node.key
+        ).open_ovpn_stream(name, cached.version if cached else None)
+        if response is None:
+            if cached is None:
+                return None
+            logger.warning(f"Serving cached OVPN client '{name}', node is failing")
+        elif response.status_code == 304:
+            await response.aclose()
+            profile_cache.touch(user.uuid, node.id)
+        else:
+            logger.info(
+                f"OVPN client downloaded for user '{name}' on node {node.address}:{node.port}"
             )
-            node_status = node_request.check_node()
-            if node_status:
-                node_request.change_user_status(f"{name}-{node.name}", status)
-                logger.info(
-                    f"User '{name}-{node.name}' changed status on node {node.address}:{node.port}"
-                )
-            else:
-                logger.warning(
-                    f"Failed to chang user status '{name}-{node.name}' on node {node.address}:{node.port}"
-                )
+            return await _download_profile(response, user.uuid, node.id)
 
+    source = profile_cache.open(user.uuid, node.id)
+    if source is None:
+        # removed by another worker since the lookup, it is a cache miss now
+        return await _open_profile(user, node)
+    return source, cached.etag
 
-async def download_ovpn_client_from_node(
-    uuid: str, node_id: int, db: Session
-) -> Response | None:
-    """Download OVPN client from a node"""
-    node = crud.get_node_by_id(db, node_id)
-    user = crud.get_user_by_uuid(db, uuid)
-    if not node or not user:
+
+async def _download_profile(
+    response: httpx.Response, uuid: str, node_id: int
+) -> tuple[BinaryIO, str] | None:
+    """Writes the node response to disk chunk by chunk, cached if the user is active.
+
+    Returns the written file opened for reading and its ETag.
+    """
+    fd, temp_path = profile_cache.temp_file()
+    digest = hashlib.sha256()
+    completed = False
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in response.aiter_bytes(config.PROFILE_STREAM_CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+        completed = True
+    except httpx.HTTPError as e:
+        logger.error(f"Error downloading OVPN client from node: {e}")
+    finally:
+        await response.aclose()
+        if not completed:
+            os.remove(temp_path)
+    if not completed:
         return None
-    result = NodeRequests(
-        address=node.address, port=node.port, api_key=node.key
-    ).download_ovpn_client(f"{user.name}-{node.name}")
-    if result:
-        logger.info(
-            f"OVPN client downloaded for user '{user.name}-{node.name}' on node {node.address}:{node.port}"
+
+    # the open file stays readable after it is moved, evicted or removed
+    source = open(temp_path, "rb")
+    etag = profile_etag(digest)
+    # the user may have been disabled or deleted while the profile downloaded
+    if await _is_active_user(uuid):
+        profile_cache.put_file(
+            uuid, node_id, temp_path, etag, response.headers.get("etag")
         )
-        return result
-    return None
+    else:
+        os.remove(temp_path)
+    return source, etag
 
 
-async def delete_user_on_all_nodes(name: str, db: Session) -> bool:
-    """Delete a user from all nodes"""
-    nodes = crud.get_all_nodes(db)
-    if nodes:
-        for node in nodes:
-            node_requests = NodeRequests(
-                address=node.address, port=node.port, api_key=node.key
-            )
-            node_status = node_requests.check_node()
-            if node_status:
-                node_requests.delete_user(f"{name}-{node.name}")
-                logger.info(
-                    f"User '{name}-{node.name}' deleted on node {node.address}:{node.port}"
-                )
-            else:
-                logger.warning(
-                    f"Failed to delete user '{name}-{node.name}' on node {node.address}:{node.port}"
-                )
+async def _read_file(source):
+    with source:
+        while chunk := source.read(config.PROFILE_STREAM_CHUNK_SIZE):
+            yield chunk
+
+
+async def _is_active_user(uuid: str) -> bool:
+    async with asyncSessionLocal() as db:
+        user = await async_crud.get_user_by_uuid(db, uuid)
+    return user is not None and user.is_active
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only file object collecting zip output until it is sent to the client"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self) -> bool:
         return True
-    return False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _zip_entry(archive: zipfile.ZipFile, name: str, source: BinaryIO):
+    with source, archive.open(f"{name}.ovpn", "w") as entry:
+        while chunk := source.read(config.PROFILE_STREAM_CHUNK_SIZE):
+            entry.write(chunk)
+
+
+async def _zip_profiles(
+    first: tuple[str, BinaryIO], profiles, tasks: list[asyncio.Task]
+):
+    """Zips each profile as soon as it is downloaded, in a thread"""
+    stream = _ZipStream()
+    archive = zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED)
+    try:
+        await asyncio.to_thread(_zip_entry, archive, *first)
+        yield stream.pop()
+        async for name, source in profiles:
+            await asyncio.to_thread(_zip_entry, archive, name, source)
+            yield stream.pop()
+        await asyncio.to_thread(archive.close)
+        yield stream.pop()
+    finally:
+        # the client may disconnect before every profile is zipped
+        for task in tasks:
+            if task.cancel() or task.cancelled() or task.exception():
+                continue
+            if task.result() is not None:
+                task.result()[1].close()
+
+
+async def download_profile_bundle(
+    uuid: str, db: AsyncSession
+) -> StreamingResponse | None:
+    """Zip the user's profiles from every healthy node, streamed as they download"""
+    user = await async_crud.get_user_by_uuid(db, uuid)
+    if not user:
+        return None
+    nodes = [
+        node
+        for node in await async_crud.get_all_nodes(db)
+        if node.status and is_node_reachable(node.id)
+    ]
+    semaphore = asyncio.Semaphore(config.NODE_FANOUT_CONCURRENCY)
+
+    async def fetch(node) -> tuple[str, BinaryIO] | None:
+        async with semaphore:
+            profile = await _open_profile(user, node)
+        return None if profile is None else (f"{user.name}-{node.name}", profile[0])
+
+    tasks = [asyncio.create_task(fetch(node)) for node in nodes]
+
+    async def downloaded():
+        for next_done in asyncio.as_completed(tasks):
+            profile = await next_done
+            if profile is not None:
+                yield profile
+
+    profiles = downloaded()
+    first = await anext(profiles, None)
+    if first is None:
+        return None
+
+    logger.info(f"OVPN bundle for user '{user.name}' sent from {len(nodes)} nodes")
+    return StreamingResponse(
+        _zip_profiles(first, profiles, tasks),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={user.name}.zip"},
+    )
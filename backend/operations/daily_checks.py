@@ -1,22 +1,31 @@
-import asyncio
+import time
 
 from backend.logger import logger
-from backend.db import crud
-from backend.db.engine import get_db
-from backend.node.task import change_user_status_on_all_nodes
+from backend.db import async_crud
+from backend.db.engine import asyncSessionLocal
+from backend.node.outbox import drain_outbox
+from backend.node.profile_cache import profile_cache
+from backend.operations.sub_cache import invalidate_subscription
 
 
-async def check_user_expiry_date():
-    """This function checks users' expiration dates"""
-    db = next(get_db())
+async def check_user_expiry_date() -> int:
+    """Deactivates expired users in one update and pushes the change to the nodes"""
+    started = time.perf_counter()
+    async with asyncSessionLocal() as db:
+        uuids = await async_crud.expire_users(db)
+    for uuid in uuids:
+        profile_cache.invalidate_user(uuid)
+        invalidate_subscription(uuid)
+    expired_at = time.perf_counter()
 
-    try:
-        expired_users = crud.get_expired_users(db)
-        for user in expired_users:
-            user.is_active = False
-            await change_user_status_on_all_nodes(name=user.name, status=False, db=db)
-            await asyncio.sleep(2)  # to avoid overload the server with commands
-        db.commit()
-
-    except Exception as e:
-        logger.error(f"Error in users expiration daily check -> {e}")
+    # the deactivations are queued in the node outbox, wait for them so the
+    # sweep time covers the nodes too
+    processed = await drain_outbox() if uuids else 0
+    finished = time.perf_counter()
+    if uuids:
+        logger.info(
+            f"Expiry sweep deactivated {len(uuids)} users in "
+            f"{finished - started:.2f}s (database {expired_at - started:.2f}s, "
+            f"nodes {finished - expired_at:.2f}s, {processed} node jobs)"
+        )
+    return len(uuids)
@@ -0,0 +1,110 @@
+import asyncio
+from datetime import date, datetime, time, timedelta
+
+from backend.config import config
+from backend.db import async_crud
+from backend.db.engine import asyncSessionLocal
+from backend.logger import logger
+from backend.operations.jobs import run_job
+from backend.operations.leader import on_leadership_change
+
+
+# upcoming expiry dates of active users, users expire when their date has passed,
+# so a date's deadline is the midnight after it. They are re-read from the
+# database on every wake, users edited on other workers are picked up within
+# EXPIRY_TIMER_RELOAD_INTERVAL
+_deadlines: list[date] = []
+_loaded_until: date | None = None  # dates before it are loaded
+_wakeup = asyncio.Event()
+_timer: asyncio.Task | None = None
+
+
+def deadline_of(expiry_date: date) -> datetime:
+    return datetime.combine(expiry_date + timedelta(days=1), time.min)
+
+
+def schedule_expiry(expiry_date: date):
+    """Wakes the timer for a new expiry date, call it after a user is created or edited.
+
+    Changes made on workers not running the timer are picked up by its reload.
+    """
+    if _loaded_until is None or expiry_date >= _loaded_until:
+        return  # not running in this worker, or picked up by a later load
+    if expiry_date not in _deadlines:
+        _wakeup.set()
+
+
+def reload_expiry_timer():
+    """Reloads the upcoming dates, for changes touching many users at once"""
+    _wakeup.set()
+
+
+async def _load(today: date):
+    global _loaded_until
+    until = today + timedelta(days=config.EXPIRY_TIMER_WINDOW)
+    async with asyncSessionLocal() as db:
+        dates = await async_crud.get_upcoming_expiry_dates(db, until)
+    _deadlines[:] = sorted(dates)
+    _loaded_until = until
+
+
+async def _run_timer():
+    while True:
+        _wakeup.clear()
+        try:
+            today = date.today()
+            await _load(today)
+
+            if _deadlines and _deadlines[0] < today:
+                # the sweep itself is set based, it expires every overdue user
+                run = await run_job("check_user_expiry", "timer")
+                if run is not None and run.error is None:
+                    continue
+                # a sweep is already running or failed, look again shortly
+                next_at = datetime.now() + timedelta(seconds=60)
+            elif _deadlines:
+                next_at = deadline_of(_deadlines[0])
+            else:
+                next_at = datetime.combine(_loaded_until, time.min)
+        except Exception as e:
+            logger.error(f"Error in expiry timer: {e}")
+            next_at = datetime.now() + timedelta(seconds=60)
+
+        # also wakes up to reload, so clock changes and users edited on other
+        # workers don't delay a deadline
+        timeout = min(
+            max((next_at - datetime.now()).total_seconds(), 0),
+            config.EXPIRY_TIMER_RELOAD_INTERVAL,
+        )
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_expiry_timer():
+    global _timer
+    if _timer is None or _timer.done():
+        _timer = asyncio.create_task(_run_timer())
+
+
+async def stop_expiry_timer():
+    global _timer
+    if _timer is not None:
+        _timer.cancel()
+        try:
+            await _timer
+        except asyncio.CancelledError:
+            pass
+        _timer = None
+
+
+async def _on_leadership_change(leader: bool):
+    # the timer only runs on the worker holding the scheduler lease
+    if leader:
+        start_expiry_timer()
+    else:
+        await stop_expiry_timer()
+
+
+on_leadership_change(_on_leadership_change)
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from backend.config import config
+from backend.db import async_crud
+from backend.db.engine import asyncSessionLocal
+from backend.logger import logger
+from backend.node.health import probe_nodes
+from backend.node.reconcile import reconcile_all_nodes
+from backend.operations.daily_checks import check_user_expiry_date
+from backend.operations.leader import INSTANCE_ID, is_leader, on_leadership_change
+from backend.schema.output import JobRun
+
+# every job returns the number of items it processed
+JOBS: dict[str, Callable[[], Awaitable[int | None]]] = {
+    "check_user_expiry": check_user_expiry_date,
+    "probe_nodes": probe_nodes,
+    "reconcile_nodes": reconcile_all_nodes,
+}
+# jobs that must run once across workers, the others keep per worker state
+# (node health) and run everywhere
+LEADER_JOBS = {"check_user_expiry", "reconcile_nodes"}
+
+scheduler = AsyncIOScheduler()
+_locks = {job_id: asyncio.Lock() for job_id in JOBS}
+# starts the manual runs queued by other workers while this one is the leader
+_queue_poller: asyncio.Task | None = None
+# keeps queued manual runs referenced until they finish
+_queued_runs: set[asyncio.Task] = set()
+
+
+def is_running(job_id: str) -> bool:
+    return _locks[job_id].locked()
+
+
+def runs_here(job_id: str) -> bool:
+    return job_id not in LEADER_JOBS or is_leader()
+
+
+# runs are recorded in the database so every worker sees the leader's history
+async def _record_start(job_id: str, trigger: str, run_id: int | None) -> int | None:
+    async with asyncSessionLocal() as db:
+        return await async_crud.start_job_run(db, job_id, trigger, INSTANCE_ID, run_id)
+
+
+async def _record_finish(run: JobRun, run_id: int):
+    try:
+        async with asyncSessionLocal() as db:
+            await async_crud.finish_job_run(
+                db, run_id, run.duration, run.items, run.error, config.JOB_HISTORY_SIZE
+            )
+    except Exception as e:
+        logger.error(f"Error recording the run of job {run.job_id}: {e}")
+
+
+async def run_job(
+    job_id: str, trigger: str = "schedule", run_id: int | None = None
+) -> JobRun | None:
+    """Runs a job and records the run, returns None when it is already running
+    or belongs to the leader and this worker is not it.
+
+    The scheduler, the expiry timer and manual runs all go through here so a
+    job never runs twice at the same time. `run_id` starts a queued manual run.
+    """
+    if not runs_here(job_id):
+        return None
+    lock = _locks[job_id]
+    if lock.locked():
+        logger.warning(f"Job {job_id} is still running, skipped {trigger} run")
+        return None
+
+    async with lock:
+        try:
+            record_id = await _record_start(job_id, trigger, run_id)
+            if record_id is None:
+                return None  # the queued run was started by another worker
+        except Exception as e:
+            # the job still runs, only its history is missing
+            logger.error(f"Error recording the run of job {job_id}: {e}")
+            record_id = None
+
+        run = JobRun(
+            job_id=job_id,
+            trigger=trigger,
+            worker=INSTANCE_ID,
+            started_at=datetime.now(),
+        )
+        started = time.perf_counter()
+        try:
+            run.items = await JOBS[job_id]()
+        except Exception as e:
+            run.error = str(e) or type(e).__name__
+            logger.error(f"Error in job {job_id} -> {run.error}")
+        run.duration = round((time.perf_counter() - started) * 1000, 2)
+        run.finished_at = datetime.now()
+        if record_id is not None:
+            await _record_finish(run, record_id)
+        return run
+
+
+async def _poll_queued_runs():
+    """Starts the manual runs other workers queued for the leader"""
+    while True:
+        try:
+            async with asyncSessionLocal() as db:
+                queued = await async_crud.get_queued_job_runs(db)
+            for queued_run in queued:
+                if queued_run.job_id not in JOBS or is_running(queued_run.job_id):
+                    continue
+                task = asyncio.create_task(
+                    run_job(queued_run.job_id, queued_run.trigger, queued_run.id)
+                )
+                _queued_runs.add(task)
+                task.add_done_callback(_queued_runs.discard)
+        except Exception as e:
+            logger.error(f"Error starting queued job runs: {e}")
+        await asyncio.sleep(config.LEADER_RENEW_INTERVAL)
+
+
+async def _on_leadership_change(leader: bool):
+    global _queue_poller
+    if leader:
+        if _queue_poller is None or _queue_poller.done():
+            _queue_poller = asyncio.create_task(_poll_queued_runs())
+        # runs of a previous leader that died midway would look running forever
+        async with asyncSessionLocal() as db:
+            await async_crud.abandon_job_runs(db, list(LEADER_JOBS), INSTANCE_ID)
+    elif _queue_poller is not None:
+        _queue_poller.cancel()
+        _queue_poller = None
+
+
+on_leadership_change(_on_leadership_change)
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from backend.config import config
+from backend.db import async_crud
+from backend.db.engine import asyncSessionLocal
+from backend.logger import logger
+
+# with several uvicorn workers each one runs the startup event, only the worker
+# holding the lease row runs the work that must happen once: the expiry sweep
+# and timer, reconciliation and the outbox retry poll
+LEASE_NAME = "scheduler"
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+_leader = False
+_lease_until = 0.0  # monotonic time the current lease runs out
+_election: asyncio.Task | None = None
+_listeners: list[Callable[[bool], Awaitable[None]]] = []
+
+
+def is_leader() -> bool:
+    return _leader
+
+
+def on_leadership_change(listener: Callable[[bool], Awaitable[None]]):
+    """Registers a callback awaited with True on election, False on stepping down"""
+    _listeners.append(listener)
+
+
+async def _set_leader(leader: bool):
+    global _leader
+    _leader = leader
+    for listener in _listeners:
+        try:
+            await listener(leader)
+        except Exception as e:
+            logger.error(f"Error in leadership listener: {e}")
+
+
+async def _become_leader():
+    await _set_leader(True)
+    logger.info(f"Worker {INSTANCE_ID} is now running the leader jobs")
+
+
+async def _step_down():
+    await _set_leader(False)
+    logger.warning(f"Worker {INSTANCE_ID} stopped running the leader jobs")
+
+
+async def _run_election():
+    global _lease_until
+    while True:
+        try:
+            async with asyncSessionLocal() as db:
+                acquired = await async_crud.acquire_lease(
+                    db, LEASE_NAME, INSTANCE_ID, config.LEADER_LEASE_TTL
+                )
+            failed = False
+        except Exception as e:
+            logger.error(f"Error renewing the scheduler lease: {e}")
+            acquired, failed = False, True
+
+        if acquired:
+            _lease_until = time.monotonic() + config.LEADER_LEASE_TTL
+            if not _leader:
+                await _become_leader()
+        elif _leader:
+            # on a database error keep going while the lease still holds, another
+            # worker can't take it before it runs out
+            expires_soon = (
+                time.monotonic() + config.LEADER_RENEW_INTERVAL >= _lease_until
+            )
+            if not failed or expires_soon:
+                await _step_down()
+        await asyncio.sleep(config.LEADER_RENEW_INTERVAL)
+
+
+def start_leader_election():
+    global _election
+    if _election is None or _election.done():
+        _election = asyncio.create_task(_run_election())
+
+
+async def stop_leader_election():
+    """Stops competing for the lease and hands it over right away if we hold it"""
+    global _election
+    if _election is not None:
+        _election.cancel()
+        try:
+            await _election
+        except asyncio.CancelledError:
+            pass
+        _election = None
+    if _leader:
+        await _step_down()
+        try:
+            async with asyncSessionLocal() as db:
+                await async_crud.release_lease(db, LEASE_NAME, INSTANCE_ID)
+        except Exception as e:
+            logger.error(f"Error releasing the scheduler lease: {e}")
@@ -0,0 +1,47 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+from backend.config import config
+from backend.node.health import on_status_change
+
+
+# rendered subscription pages keyed by user uuid with the time they were stored,
+# oldest first. Invalidation only reaches this process, with several workers the
+# others serve their copy until SUBSCRIPTION_CACHE_TTL runs out
+_pages: OrderedDict[str, tuple[str, str, float]] = OrderedDict()
+
+
+def get_page(uuid: str) -> tuple[str, str] | None:
+    """Returns the cached (html, etag) of a subscription page"""
+    page = _pages.get(uuid)
+    if page is None:
+        return None
+    html, etag, stored_at = page
+    if time.monotonic() - stored_at >= config.SUBSCRIPTION_CACHE_TTL:
+        del _pages[uuid]
+        return None
+    _pages.move_to_end(uuid)
+    return html, etag
+
+
+def set_page(uuid: str, html: str) -> tuple[str, str]:
+    etag = f'"{hashlib.sha256(html.encode()).hexdigest()[:32]}"'
+    _pages[uuid] = (html, etag, time.monotonic())
+    _pages.move_to_end(uuid)
+    while len(_pages) > config.SUBSCRIPTION_CACHE_SIZE:
+        _pages.popitem(last=False)
+    return html, etag
+
+
+def invalidate_subscription(uuid: str):
+    """Drops the cached page of a user, call it after any change to the user"""
+    _pages.pop(uuid, None)
+
+
+def invalidate_all_subscriptions(*_):
+    """Drops every cached page, call it after any node change"""
+    _pages.clear()
+
+
+on_status_change(invalidate_all_subscriptions)
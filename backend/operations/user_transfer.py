@@ -0,0 +1,230 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import date
+from itertools import islice
+from typing import AsyncIterator, Iterator
+from uuid import uuid4
+
+from fastapi import UploadFile
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import config
+from backend.db import async_crud
+from backend.db.engine import asyncSessionLocal
+from backend.logger import logger
+from backend.node.outbox import notify_outbox
+from backend.schema._input import ImportUser, UserFilter
+from backend.schema.output import ImportResult, ImportRowError
+
+EXPORT_FIELDS = ["name", "uuid", "expiry_date", "is_active", "owner"]
+
+
+def _text_lines(upload: UploadFile, invalid: set[int]) -> Iterator[str]:
+    """Decodes the spooled upload line by line, keeping the line endings so csv
+    can parse quoted fields that span lines. Lines that aren't utf-8 are added
+    to `invalid` and yielded with replacement characters.
+    """
+    for line_no, raw in enumerate(upload.file, start=1):
+        try:
+            yield raw.decode("utf-8-sig" if line_no == 1 else "utf-8")
+        except UnicodeDecodeError:
+            invalid.add(line_no)
+            yield raw.decode("utf-8", errors="replace")
+
+
+def _parse_rows(upload: UploadFile, file_format: str):
+    """Yields (line number, row dict, error) for every non empty record"""
+    if file_format == "jsonl":
+        return _parse_jsonl(upload)
+    return _parse_csv(upload)
+
+
+def _parse_jsonl(upload: UploadFile):
+    invalid: set[int] = set()
+    for line_no, line in enumerate(_text_lines(upload, invalid), start=1):
+        if not line.strip():
+            continue
+        try:
+            if line_no in invalid:
+                raise ValueError("line is not valid utf-8")
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("expected a json object")
+        except ValueError as e:
+            yield line_no, None, str(e)
+            continue
+        yield line_no, row, None
+
+
+def _parse_csv(upload: UploadFile):
+    invalid: set[int] = set()
+    reader = csv.reader(_text_lines(upload, invalid), strict=True)
+    header = None
+    while True:
+        line_no = reader.line_num + 1  # the line the record starts on
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield line_no, None, str(e)
+            continue
+        if not any(value.strip() for value in values):
+            continue
+        if any(line_no <= bad <= reader.line_num for bad in invalid):
+            yield line_no, None, "line is not valid utf-8"
+            continue
+        if header is None:
+            header = [field.strip() for field in values]
+            continue
+        if len(values) != len(header):
+            yield line_no, None, f"expected {len(header)} columns"
+            continue
+        yield line_no, dict(zip(header, values)), None
+
+
+async def _import_chunk(
+    db: AsyncSession,
+    chunk: list[tuple[int, ImportUser]],
+    owner: str | None,
+    seen: tuple[set[str], set[str]],
+    errors: list[ImportRowError],
+) -> int:
+    seen_names, seen_uuids = seen
+    taken_names, taken_uuids = await async_crud.get_taken_user_keys(
+        db,
+        [row.name.replace(" ", "_") for _, row in chunk],
+        [row.uuid for _, row in chunk if row.uuid],
+    )
+    today = date.today()
+    rows = []
+    for line_no, row in chunk:
+        name = row.name.replace(" ", "_")
+        if name in taken_names or name in seen_names:
+            errors.append(
+                ImportRowError(
+                    line=line_no, name=name, error="user with this name already exists"
+                )
+            )
+            continue
+        if row.uuid and (row.uuid in taken_uuids or row.uuid in seen_uuids):
+            errors.append(
+                ImportRowError(
+                    line=line_no, name=name, error="user with this uuid already exists"
+                )
+            )
+            continue
+        seen_names.add(name)
+        uuid = row.uuid or str(uuid4())
+        seen_uuids.add(uuid)
+        rows.append(
+            {
+                "name": name,
+                "uuid": uuid,
+                "expiry_date": row.expiry_date,
+                # an expired user can't be active, as in update_user
+                "is_active": row.is_active and row.expiry_date >= today,
+                "owner": owner or row.owner or "owner",
+            }
+        )
+    if not rows:
+        return 0
+
+    try:
+        await async_crud.insert_users(db, rows)
+        return len(rows)
+    except IntegrityError as e:
+        await db.rollback()
+        logger.warning(f"Error importing a chunk of users, retrying row by row: {e}")
+
+    # a user created while the chunk was checked conflicts, only that row fails
+    lines = {row.name.replace(" ", "_"): line_no for line_no, row in chunk}
+    imported = 0
+    for row in rows:
+        try:
+            await async_crud.insert_users(db, [row])
+            imported += 1
+        except IntegrityError:
+            await db.rollback()
+            errors.append(
+                ImportRowError(
+                    line=lines[row["name"]],
+                    name=row["name"],
+                    error="conflicts with an existing user",
+                )
+            )
+    return imported
+
+
+def _validated_rows(upload: UploadFile, file_format: str):
+    """Yields (line number, user, error) for every record of the upload"""
+    for line_no, data, error in _parse_rows(upload, file_format):
+        if error:
+            yield line_no, None, ImportRowError(line=line_no, error=error)
+            continue
+        try:
+            row = ImportUser(**{k: v for k, v in data.items() if v not in ("", None)})
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+                for item in e.errors()
+            )
+            yield line_no, None, ImportRowError(
+                line=line_no, name=data.get("name"), error=message
+            )
+            continue
+        yield line_no, row, None
+
+
+async def import_users(
+    upload: UploadFile, file_format: str, owner: str | None, db: AsyncSession
+) -> ImportResult:
+    """Imports users from a csv or jsonl upload, one transaction per chunk.
+
+    `owner` is forced on every row when set, otherwise the row's owner is used.
+    """
+    errors: list[ImportRowError] = []
+    seen: tuple[set[str], set[str]] = (set(), set())
+    imported = 0
+
+    records = _validated_rows(upload, file_format)
+    # reading and parsing the spooled file blocks, it runs in a thread chunk by chunk
+    while batch := await asyncio.to_thread(
+        list, islice(records, config.USER_IO_CHUNK_SIZE)
+    ):
+        chunk: list[tuple[int, ImportUser]] = []
+        for line_no, row, error in batch:
+            if error:
+                errors.append(error)
+            else:
+                chunk.append((line_no, row))
+        if chunk:
+            imported += await _import_chunk(db, chunk, owner, seen, errors)
+
+    if imported:
+        notify_outbox()
+    logger.info(f"users imported: {imported}, failed rows: {len(errors)}")
+    errors.sort(key=lambda error: error.line)
+    return ImportResult(imported=imported, failed=len(errors), errors=errors)
+
+
+async def export_users(filters: UserFilter, file_format: str) -> AsyncIterator[str]:
+    """Streams users as ndjson or csv, batch by batch from a server side cursor"""
+    async with asyncSessionLocal() as db:
+        result = await async_crud.stream_users(db, filters, config.USER_IO_CHUNK_SIZE)
+        if file_format == "csv":
+            yield ",".join(EXPORT_FIELDS) + "\r\n"
+        async for rows in result.partitions():
+            buffer = io.StringIO()
+            if file_format == "csv":
+                csv.writer(buffer).writerows(rows)
+            else:
+                for row in rows:
+                    item = dict(zip(EXPORT_FIELDS, row))
+                    item["expiry_date"] = item["expiry_date"].isoformat()
+                    buffer.write(json.dumps(item) + "\n")
+            yield buffer.getvalue()
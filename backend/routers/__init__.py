@@ -3,6 +3,7 @@ from .users import router as user_router
 from .admins import router as admin_router
 from .node import router as node_router
 from .setting import router as setting_router
+from .jobs import router as jobs_router
 
 all_routers = [
     login_router,
@@ -10,4 +11,5 @@ all_routers = [
     setting_router,
     node_router,
     admin_router,
+    jobs_router,
 ]
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from datetime import date, timedelta
 
-from backend.db.engine import get_db
-from backend.db import crud
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.engine import get_async_db
+from backend.db import async_crud
 from backend.schema.output import Admins, ResponseModel
 from backend.schema._input import AdminCreate
 from backend.auth.auth import get_current_user
@@ -13,15 +15,20 @@ router = APIRouter(prefix="/admin", tags=["Admins"])
 
 @router.get("/", response_model=ResponseModel)
 async def get_all_admins(
-    db: Session = Depends(get_db), user: dict = Depends(get_current_user)
+    expiring_within: int = Query(default=7, ge=0, description="in days"),
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
 ):
-    result = crud.get_all_admins(db)
-    users = crud.get_all_users(db)
+    soon = date.today() + timedelta(days=expiring_within)
+    rows = await async_crud.get_admins_with_stats(db, soon)
 
     admin_list = []
-    for admin in result:
+    for admin, users_count, active, expired, expiring_soon in rows:
         admin_data = Admins.from_orm(admin)
-        admin_data.users_count = sum(1 for u in users if u.owner == admin.username)
+        admin_data.users_count = users_count
+        admin_data.active_count = active
+        admin_data.expired_count = expired
+        admin_data.expiring_soon_count = expiring_soon
         admin_list.append(admin_data)
 
     return ResponseModel(
@@ -34,7 +41,7 @@ async def get_all_admins(
 @router.post("/", response_model=ResponseModel)
 async def create_admin(
     admin: AdminCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
     if user["type"] != "main_admin":
@@ -42,13 +49,13 @@ async def create_admin(
             success=False, msg="You do not have permission for this action", data=None
         )
 
-    existing_admin = crud.get_admin_by_username(db, username=admin.username)
+    existing_admin = await async_crud.get_admin_by_username(db, username=admin.username)
     if existing_admin:
         return ResponseModel(
             success=False, msg="Admin with this username already exists", data=None
         )
 
-    new_admin = crud.create_admin(db, admin)
+    new_admin = await async_crud.create_admin(db, admin)
     return ResponseModel(
         success=True,
         msg="Admin created successfully",
@@ -59,7 +66,7 @@ async def create_admin(
 @router.put("/")
 async def update_admin(
     admin: AdminCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
     if user["type"] != "main_admin":
@@ -67,11 +74,11 @@ async def update_admin(
             success=False, msg="You do not have permission for this action", data=None
         )
 
-    existing_admin = crud.get_admin_by_username(db, username=admin.username)
+    existing_admin = await async_crud.get_admin_by_username(db, username=admin.username)
     if not existing_admin:
         return ResponseModel(success=False, msg="Admin not found", data=None)
 
-    updated_admin = crud.update_admin(db, existing_admin, admin)
+    updated_admin = await async_crud.update_admin(db, existing_admin, admin)
     return ResponseModel(
         success=True,
         msg="Admin updated successfully",
@@ -82,7 +89,7 @@ async def update_admin(
 @router.delete("/{username}")
 async def delete_admin(
     username: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
     if user["type"] != "main_admin":
@@ -90,11 +97,11 @@ async def delete_admin(
             success=False, msg="You do not have permission for this action", data=None
         )
 
-    existing_admin = crud.get_admin_by_username(db, username=username)
+    existing_admin = await async_crud.get_admin_by_username(db, username=username)
     if not existing_admin:
         return ResponseModel(success=False, msg="Admin not found", data=None)
 
-    crud.delete_admin(db, existing_admin)
+    await async_crud.delete_admin(db, existing_admin)
     return ResponseModel(
         success=True,
         msg="Admin deleted successfully",
@@ -0,0 +1,103 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth.auth import get_current_user
+from backend.db import async_crud
+from backend.db.engine import get_async_db
+from backend.operations.jobs import (
+    JOBS,
+    LEADER_JOBS,
+    is_running,
+    run_job,
+    runs_here,
+    scheduler,
+)
+from backend.schema.output import JobInfo, JobRun, ResponseModel
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# keeps manual runs referenced until they finish
+_manual_runs: set[asyncio.Task] = set()
+
+
+async def _running_jobs(db: AsyncSession) -> set[str]:
+    """Jobs running here, and leader jobs running on whichever worker leads"""
+    running = {job_id for job_id in JOBS if is_running(job_id)}
+    return running | (await async_crud.get_running_job_ids(db) & LEADER_JOBS)
+
+
+@router.get("/", response_model=ResponseModel)
+async def list_jobs(
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+):
+    if user["type"] != "main_admin":
+        return ResponseModel(success=False, msg="Unauthorized access", data=None)
+
+    running = await _running_jobs(db)
+    jobs = []
+    for job_id in JOBS:
+        scheduled = scheduler.get_job(job_id) if scheduler.running else None
+        last_runs = await async_crud.get_job_runs(db, job_id, limit=1)
+        jobs.append(
+            JobInfo(
+                job_id=job_id,
+                running=job_id in running,
+                next_run_time=scheduled.next_run_time if scheduled else None,
+                last_run=JobRun.model_validate(last_runs[0]) if last_runs else None,
+            )
+        )
+    return ResponseModel(success=True, msg="Jobs retrieved successfully", data=jobs)
+
+
+@router.get("/runs", response_model=ResponseModel)
+async def list_job_runs(
+    job_id: str | None = None,
+    limit: int = Query(default=50, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+):
+    if user["type"] != "main_admin":
+        return ResponseModel(success=False, msg="Unauthorized access", data=None)
+
+    runs = await async_crud.get_job_runs(db, job_id, limit)
+    return ResponseModel(
+        success=True,
+        msg="Job runs retrieved successfully",
+        data=[JobRun.model_validate(run) for run in runs],
+    )
+
+
+@router.post(
+    "/{job_id}/run",
+    response_model=ResponseModel,
+    description="Starts a job now, its result shows up in the job runs",
+)
+async def trigger_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+):
+    if user["type"] != "main_admin":
+        return ResponseModel(success=False, msg="Unauthorized access", data=None)
+
+    if job_id not in JOBS:
+        return ResponseModel(success=False, msg="Job not found", data=None)
+    if job_id in await _running_jobs(db):
+        return ResponseModel(success=False, msg="Job is already running", data=None)
+
+    if not runs_here(job_id):
+        # leader jobs only run on the worker holding the scheduler lease, it
+        # picks the queued run up
+        queued = await async_crud.get_queued_job_runs(db)
+        if any(run.job_id == job_id for run in queued):
+            return ResponseModel(success=False, msg="Job is already queued", data=None)
+        await async_crud.queue_job_run(db, job_id)
+        return ResponseModel(success=True, msg="Job queued", data=None)
+
+    task = asyncio.create_task(run_job(job_id, "manual"))
+    _manual_runs.add(task)
+    task.add_done_callback(_manual_runs.discard)
+    return ResponseModel(success=True, msg="Job started", data=None)
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.auth.auth import get_current_user
-from backend.db.engine import get_db
+from backend.db.engine import get_async_db
 from backend.schema.output import ResponseModel
 from backend.schema._input import NodeCreate
 from backend.node.task import (
@@ -13,6 +13,7 @@ from backend.node.task import (
     list_nodes_handler,
     get_node_status_handler,
 )
+from backend.node.reconcile import reconcile_nodes
 
 router = APIRouter(prefix="/nodes", tags=["Nodes"])
 
@@ -20,7 +21,7 @@ router = APIRouter(prefix="/nodes", tags=["Nodes"])
 @router.post("/", response_model=ResponseModel)
 async def add_node(
     request: NodeCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
     if user["type"] != "main_admin":
@@ -33,11 +34,33 @@ async def add_node(
     )
 
 
+@router.post(
+    "/reconcile",
+    response_model=ResponseModel,
+    description="Sync node clients with the panel users, use dry_run to only get the plan",
+)
+async def reconcile(
+    node_id: int | None = None,
+    dry_run: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+):
+    if user["type"] != "main_admin":
+        return ResponseModel(success=False, msg="Unauthorized access", data=None)
+
+    results = await reconcile_nodes(db, node_id=node_id, dry_run=dry_run)
+    return ResponseModel(
+        success=all(result.error is None for result in results),
+        msg="Reconcile plan created" if dry_run else "Reconcile changes queued",
+        data=results,
+    )
+
+
 @router.put("/{node_id}", response_model=ResponseModel)
 async def update_node(
     node_id: int,
     request: NodeCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
     if user["type"] != "main_admin":
@@ -53,7 +76,7 @@ async def update_node(
 @router.get("/{node_id}/status/", response_model=ResponseModel)
 async def get_node_status(
     node_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
     if user["type"] != "main_admin":
@@ -69,7 +92,7 @@ async def get_node_status(
 
 @router.get("/", response_model=ResponseModel)
 async def list_nodes(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
     nodes = await list_nodes_handler(db)
@@ -85,12 +108,18 @@ async def list_nodes(
     description="Download OVPN client configuration from a node",
 )
 async def download_ovpn_client(
+    request: Request,
     node_id: int,
     uuid: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
-    response = await download_ovpn_client_from_node(db=db, uuid=uuid, node_id=node_id)
+    response = await download_ovpn_client_from_node(
+        db=db,
+        uuid=uuid,
+        node_id=node_id,
+        if_none_match=request.headers.get("if-none-match"),
+    )
     if response:
         return response
     else:
@@ -100,7 +129,7 @@ async def download_ovpn_client(
 @router.delete("/{node_id}", response_model=ResponseModel)
 async def delete_node(
     node_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
     if user["type"] != "main_admin":
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.db.engine import get_db
-from backend.db import crud
+from backend.db.engine import get_async_db
+from backend.db import async_crud
 from backend.auth.auth import get_current_user
 from backend.operations.server_info import get_server_info
 from backend.schema.output import Settings, ServerInfo, ResponseModel
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/server", tags=["Panel Settings"])
 @router.get("/settings", response_model=ResponseModel)
 async def get_settings(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: str = Depends(get_current_user),
 ):
     settings = Settings(
@@ -1,70 +1,96 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.config import config
-from backend.db.engine import get_db
-from backend.db import crud
-from backend.node.task import download_ovpn_client_from_node
-from backend.node.requests import NodeRequests
+from backend.db.engine import get_async_db
+from backend.db import async_crud
+from backend.node.task import download_ovpn_client_from_node, download_profile_bundle
+from backend.node.health import is_node_reachable
+from backend.operations.sub_cache import get_page, set_page
 
 
 templates = Jinja2Templates(directory="frontend/templates")
 router = APIRouter(prefix=f"/{config.SUBSCRIPTION_PATH}", tags=["Subscription"])
 
 
+def subscription_base_url() -> str:
+    """Base of the links on the subscription page.
+
+    The page is cached and shared by every client, so it is never built from the
+    request's Host header: the configured prefix, or links relative to the host.
+    """
+    if config.SUBSCRIPTION_URL_PREFIX is not None:
+        return config.SUBSCRIPTION_URL_PREFIX.rstrip("/") + "/"
+    return "/"
+
+
 @router.get("/{uuid}")
 async def get_subscription(
     request: Request,
     uuid: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = crud.get_user_by_uuid(db, uuid)
-    if not user:
-        raise HTTPException(status_code=404)
-    nodes = crud.get_all_nodes(db)
-    ovpn_download_links = {}
-    for node in nodes:
-        if not node.status:
-            continue
-        try:
-            status = NodeRequests(
-                address=node.address, port=node.port, api_key=node.key
-            ).check_node()
-        except Exception:
-            continue
-        if not status:
-            continue
+    page = get_page(uuid)
+    if page is None:
+        base_url = subscription_base_url()
+        user = await async_crud.get_user_by_uuid(db, uuid)
+        if not user:
+            raise HTTPException(status_code=404)
+        nodes = await async_crud.get_all_nodes(db)
+        ovpn_download_links = {}
+        for node in nodes:
+            if not node.status or not is_node_reachable(node.id):
+                continue
+
+            ovpn_download_links[node.name] = (
+                f"{base_url}{config.SUBSCRIPTION_PATH}/download/{uuid}/{node.name}"
+            )
 
-        ovpn_download_links[node.name] = (
-            f"{request.base_url}{config.SUBSCRIPTION_PATH}/download/{uuid}/{node.name}"
+        html = templates.get_template("subscription.html").render(
+            name=user.name,
+            expiry_date=user.expiry_date,
+            is_active=user.is_active,
+            ovpn_download_links=ovpn_download_links,
+            bundle_link=f"{base_url}{config.SUBSCRIPTION_PATH}/bundle/{uuid}",
         )
+        page = set_page(uuid, html)
 
-    return templates.TemplateResponse(
-        "subscription.html",
-        {
-            "request": request,
-            "name": user.name,
-            "expiry_date": user.expiry_date,
-            "is_active": user.is_active,
-            "ovpn_download_links": ovpn_download_links,
-        },
-    )
+    html, etag = page
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(html, headers=headers)
 
 
 @router.get("/download/{uuid}/{node_name}")
 async def download_ovpn(
+    request: Request,
     uuid: str,
     node_name: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = crud.get_user_by_uuid(db, uuid)
+    user = await async_crud.get_user_by_uuid(db, uuid)
     if not user:
         raise HTTPException(status_code=404)
-    node_obj = crud.get_node_by_name(db, node_name)
+    node_obj = await async_crud.get_node_by_name(db, node_name)
     if not node_obj:
         raise HTTPException(status_code=404)
-    response = await download_ovpn_client_from_node(user.uuid, node_obj.id, db)
+    response = await download_ovpn_client_from_node(
+        user.uuid, node_obj.id, db, request.headers.get("if-none-match")
+    )
+    if not response:
+        raise HTTPException(status_code=404, detail="File not found")
+    return response
+
+
+@router.get("/bundle/{uuid}")
+async def download_bundle(
+    uuid: str,
+    db: AsyncSession = Depends(get_async_db),
+):
+    response = await download_profile_bundle(uuid, db)
     if not response:
         raise HTTPException(status_code=404, detail="File not found")
     return response
@@ -1,66 +1,162 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-
-from backend.operations.daily_checks import check_user_expiry_date
-from backend.schema.output import ResponseModel, Users
-from backend.schema._input import CreateUser, UpdateUser
-from backend.db.engine import get_db
-from backend.db import crud
-from backend.auth.auth import get_current_user
-from backend.node.task import (
-    delete_user_on_all_nodes,
-    change_user_status_on_all_nodes,
+import base64
+import json
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.schema.output import BulkResult, ResponseModel, UserPage, Users
+from backend.schema._input import (
+    BulkExtendUsers,
+    BulkUsers,
+    CreateUser,
+    UpdateUser,
+    UserFilter,
 )
+from backend.db.engine import get_async_db
+from backend.db import async_crud
+from backend.auth.auth import get_current_user
+from backend.node.outbox import notify_outbox
+from backend.node.profile_cache import profile_cache
+from backend.operations import user_transfer
+from backend.operations.expiry_timer import reload_expiry_timer, schedule_expiry
+from backend.operations.sub_cache import invalidate_subscription
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
+def _encode_cursor(user, sort: str, order: str) -> str:
+    value = getattr(user, sort)
+    payload = {
+        "sort": sort,
+        "order": order,
+        "value": value.isoformat() if isinstance(value, date) else value,
+        "id": user.id,
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if payload["sort"] != sort or payload["order"] != order:
+            raise ValueError("cursor belongs to another sort order")
+        value = payload["value"]
+        if sort == "expiry_date":
+            value = date.fromisoformat(value)
+        return value, int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"invalid cursor: {e}")
+
+
 @router.get("/", response_model=ResponseModel)
 async def get_all_users(
-    db: Session = Depends(get_db), user: dict = Depends(get_current_user)
+    filters: UserFilter = Depends(),
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "name", "expiry_date"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
 ):
-    if user["type"] == "main_admin":
-        all_users = crud.get_all_users(db)
-        users_list = [Users.from_orm(user) for user in all_users]
+    if user["type"] not in ("main_admin", "admin"):
         return ResponseModel(
-            success=True,
-            msg="Users retrieved successfully",
-            data=users_list,
+            success=False,
+            msg="Unauthorized access",
         )
 
-    elif user["type"] == "admin":
-        admin_users = crud.get_users_by_admin(db, admin_username=user["username"])
-        users_list = [Users.from_orm(u) for u in admin_users]
-        return ResponseModel(
-            success=True,
-            msg="Users retrieved successfully",
-            data=users_list,
-        )
+    if user["type"] == "admin":
+        filters.owner = user["username"]
+
+    after = _decode_cursor(cursor, sort, order) if cursor else None
+    users = await async_crud.get_users_page(
+        db, filters, limit + 1, sort=sort, descending=order == "desc", after=after
+    )
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = _encode_cursor(users[-1], sort, order)
+    total, active = await async_crud.count_users(db, filters)
 
     return ResponseModel(
-        success=False,
-        msg="Unauthorized access",
+        success=True,
+        msg="Users retrieved successfully",
+        data=UserPage(
+            users=[Users.from_orm(u) for u in users],
+            next_cursor=next_cursor,
+            total=total,
+            active=active,
+        ),
+    )
+
+
+@router.post("/import", response_model=ResponseModel)
+async def import_users(
+    file: UploadFile,
+    file_format: Optional[Literal["csv", "jsonl"]] = Query(
+        default=None, alias="format"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+):
+    if user["type"] not in ("main_admin", "admin"):
+        return ResponseModel(success=False, msg="Unauthorized access")
+
+    if file_format is None:
+        name = (file.filename or "").lower()
+        file_format = "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+    owner = user["username"] if user["type"] == "admin" else None
+    result = await user_transfer.import_users(file, file_format, owner, db)
+    if result.imported:
+        reload_expiry_timer()
+    return ResponseModel(
+        success=result.failed == 0,
+        msg=f"{result.imported} users imported, {result.failed} rows failed",
+        data=result,
+    )
+
+
+@router.get("/export")
+async def export_users(
+    filters: UserFilter = Depends(),
+    file_format: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    user: dict = Depends(get_current_user),
+):
+    if user["type"] not in ("main_admin", "admin"):
+        raise HTTPException(status_code=403, detail="Unauthorized access")
+
+    if user["type"] == "admin":
+        filters.owner = user["username"]
+    return StreamingResponse(
+        user_transfer.export_users(filters, file_format),
+        media_type="text/csv" if file_format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename=users.{file_format}"},
     )
 
 
 @router.post("/", response_model=ResponseModel)
 async def create_user(
     request: CreateUser,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
-    check_user = crud.get_user_by_name(db, request.name)
+    check_user = await async_crud.get_user_by_name(db, request.name)
     if check_user is not None:
         return ResponseModel(
             success=False, msg="User with this name already exists", data=None
         )
 
     if user["type"] == "admin":
-        crud.create_user(db, request, user["username"])
+        new_user = await async_crud.create_user(db, request, user["username"])
+        notify_outbox()
+        schedule_expiry(new_user.expiry_date)
         return ResponseModel(success=True, msg="User created successfully", data=None)
 
-    crud.create_user(db, request, "owner")
+    new_user = await async_crud.create_user(db, request, "owner")
+    notify_outbox()
+    schedule_expiry(new_user.expiry_date)
     return ResponseModel(
         success=True, msg="User created successfully", data=request.name
     )
@@ -70,11 +166,18 @@ async def create_user(
 async def update_user(
     uuid: str,
     request: UpdateUser,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
-    result = crud.update_user(db, uuid, request)
-    check_user_expiry_date()
+    existing_user = await async_crud.get_user_by_uuid(db, uuid)
+    was_active = existing_user.is_active if existing_user else None
+    result = await async_crud.update_user(db, uuid, request)
+    invalidate_subscription(uuid)
+    schedule_expiry(existing_user.expiry_date)
+    if existing_user.is_active != was_active:
+        if not existing_user.is_active:
+            profile_cache.invalidate_user(uuid)
+        notify_outbox()
     return ResponseModel(success=True, msg="User updated successfully", data=result)
 
 
@@ -82,22 +185,131 @@ async def update_user(
 async def change_user_status(
     uuid: str,
     request: UpdateUser,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: dict = Depends(get_current_user),
 ):
-    await change_user_status_on_all_nodes(uuid, request.name, request.status, db)
+    existing_user = await async_crud.get_user_by_uuid(db, uuid)
+    if existing_user is None:
+        return ResponseModel(success=False, msg="User not found", data=None)
+
+    await async_crud.change_user_status(db, uuid, request.status)
+    invalidate_subscription(uuid)
+    if request.status:
+        schedule_expiry(existing_user.expiry_date)
+    else:
+        profile_cache.invalidate_user(uuid)
+    notify_outbox()
     return ResponseModel(success=True, msg="Changed user status successfully")
 
 
 @router.delete("/{uuid}", response_model=ResponseModel)
 async def delete_user(
-    uuid: str, db: Session = Depends(get_db), user: dict = Depends(get_current_user)
+    uuid: str,
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
 ):
-    user = crud.get_user_by_uuid(db, uuid)
+    user = await async_crud.get_user_by_uuid(db, uuid)
     if user is None:
         return ResponseModel(success=False, msg="User not found", data=None)
 
-    if await delete_user_on_all_nodes(user.name, db):
-        crud.delete_user(db, user.name)
-        return ResponseModel(success=True, msg="User deleted successfully")
-    return ResponseModel(success=False, msg="Failed to delete user on all nodes")
+    await async_crud.delete_user(db, user.name)
+    invalidate_subscription(uuid)
+    profile_cache.invalidate_user(uuid)
+    notify_outbox()
+    return ResponseModel(success=True, msg="User deleted successfully")
+
+
+def _bulk_conditions(request: BulkUsers, user: dict) -> list:
+    if request.uuids is None and request.filter is None:
+        raise HTTPException(status_code=400, detail="uuids or filter is required")
+    owner = user["username"] if user["type"] == "admin" else None
+    return async_crud.bulk_user_conditions(request.uuids, request.filter, owner)
+
+
+@router.post("/bulk/extend", response_model=ResponseModel)
+async def bulk_extend_users(
+    request: BulkExtendUsers,
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+):
+    if (request.days is None) == (request.expiry_date is None):
+        raise HTTPException(
+            status_code=400, detail="exactly one of days or expiry_date is required"
+        )
+
+    conditions = _bulk_conditions(request, user)
+    uuids, changes = await async_crud.bulk_extend_users(
+        db, conditions, days=request.days, expiry_date=request.expiry_date
+    )
+    for uuid in uuids:
+        invalidate_subscription(uuid)
+    if uuids:
+        reload_expiry_timer()
+    for uuid, action in changes:
+        if action == "deactivate":
+            profile_cache.invalidate_user(uuid)
+    if changes:
+        notify_outbox()
+    return ResponseModel(
+        success=True,
+        msg=f"{len(uuids)} users updated",
+        data=BulkResult(affected=len(uuids), queued=len(changes)),
+    )
+
+
+async def _bulk_set_status(
+    request: BulkUsers, status: bool, db: AsyncSession, user: dict
+) -> ResponseModel:
+    conditions = _bulk_conditions(request, user)
+    uuids = await async_crud.bulk_set_user_status(db, conditions, status)
+    for uuid in uuids:
+        invalidate_subscription(uuid)
+        if not status:
+            profile_cache.invalidate_user(uuid)
+    if uuids and status:
+        reload_expiry_timer()
+    if uuids:
+        notify_outbox()
+    return ResponseModel(
+        success=True,
+        msg=f"{len(uuids)} users {'enabled' if status else 'disabled'}",
+        data=BulkResult(affected=len(uuids), queued=len(uuids)),
+    )
+
+
+@router.post("/bulk/enable", response_model=ResponseModel)
+async def bulk_enable_users(
+    request: BulkUsers,
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+):
+    return await _bulk_set_status(request, True, db, user)
+
+
+@router.post("/bulk/disable", response_model=ResponseModel)
+async def bulk_disable_users(
+    request: BulkUsers,
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+):
+    return await _bulk_set_status(request, False, db, user)
+
+
+@router.post("/bulk/delete", response_model=ResponseModel)
+async def bulk_delete_users(
+    request: BulkUsers,
+    db: AsyncSession = Depends(get_async_db),
+    user: dict = Depends(get_current_user),
+):
+    conditions = _bulk_conditions(request, user)
+    uuids = await async_crud.bulk_delete_users(db, conditions)
+    for uuid in uuids:
+        invalidate_subscription(uuid)
+        profile_cache.invalidate_user(uuid)
+    if uuids:
+        notify_outbox()
+    return ResponseModel(
+        success=True,
+        msg=f"{len(uuids)} users deleted",
+        data=BulkResult(affected=len(uuids), queued=len(uuids)),
+    )
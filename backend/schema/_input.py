@@ -9,6 +9,32 @@ class CreateUser(BaseModel):
     expiry_date: date
 
 
+class ImportUser(BaseModel):
+    name: str = Field(min_length=3, max_length=10)
+    expiry_date: date
+    is_active: bool = True
+    owner: Optional[str] = None
+    uuid: Optional[str] = None
+
+
+class UserFilter(BaseModel):
+    owner: Optional[str] = None
+    is_active: Optional[bool] = None
+    expiring_before: Optional[date] = None
+    expiring_after: Optional[date] = None
+    search: Optional[str] = Field(default=None, description="name prefix")
+
+
+class BulkUsers(BaseModel):
+    uuids: Optional[list[str]] = None
+    filter: Optional[UserFilter] = None  # an empty filter selects every user
+
+
+class BulkExtendUsers(BulkUsers):
+    days: Optional[int] = None
+    expiry_date: Optional[date] = None
+
+
 class UpdateUser(BaseModel):
     name: str
     expiry_date: Optional[date]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from datetime import date
+from datetime import date, datetime
 from typing import Any, Optional
 
 
@@ -20,6 +20,30 @@ class Users(BaseModel):
         from_attributes = True
 
 
+class UserPage(BaseModel):
+    users: list[Users]
+    next_cursor: Optional[str] = None
+    total: int  # users matching the filters
+    active: int
+
+
+class ImportRowError(BaseModel):
+    line: int
+    name: Optional[str] = None
+    error: str
+
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[ImportRowError]
+
+
+class BulkResult(BaseModel):
+    affected: int
+    queued: int  # user changes queued for the nodes
+
+
 class ServerInfo(BaseModel):
     cpu: float
     memory_total: int
@@ -42,6 +66,76 @@ class Settings(BaseModel):
 class Admins(BaseModel):
     username: str
     users_count: int = 0
+    active_count: int = 0
+    expired_count: int = 0
+    expiring_soon_count: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class BatchItemResult(BaseModel):
+    name: str
+    action: str
+    success: bool
+    error: Optional[str] = None
+
+
+class NodeResult(BaseModel):
+    node_id: int
+    node_name: str
+    success: bool
+    error: Optional[str] = None
+    latency: float  # in milliseconds
+
+
+class NodeJobStats(BaseModel):
+    pending: int = 0  # user changes still to be applied on the node
+    failed: int = 0  # user changes given up after the last retry
+    last_error: Optional[str] = None
+
+
+class NodeHealth(BaseModel):
+    reachable: bool
+    latency: float  # in milliseconds
+    last_error: Optional[str] = None
+    checked_at: datetime
+
+
+class CircuitState(BaseModel):
+    state: str  # closed, open or half_open
+    failures: int
+    retry_at: Optional[datetime] = None
+
+
+class ReconcileResult(BaseModel):
+    node_id: int
+    node_name: str
+    create: list[str] = []
+    activate: list[str] = []
+    deactivate: list[str] = []
+    delete: list[str] = []
+    unmanaged: list[str] = []  # node clients the panel did not create, left alone
+    skipped: bool = False
+    error: Optional[str] = None
+
+
+class JobRun(BaseModel):
+    job_id: str
+    trigger: str  # schedule, timer or manual
+    worker: Optional[str] = None  # instance id of the worker that ran it
+    started_at: Optional[datetime] = None  # empty while queued for the leader
+    finished_at: Optional[datetime] = None
+    duration: Optional[float] = None  # in milliseconds
+    items: Optional[int] = None  # processed by the run
+    error: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+class JobInfo(BaseModel):
+    job_id: str
+    running: bool
+    next_run_time: Optional[datetime] = None
+    last_run: Optional[JobRun] = None
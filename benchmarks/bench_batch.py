@@ -0,0 +1,45 @@
+"""Compares one request per user against batch requests on a local mock node.
+
+    python -m benchmarks.bench_batch --users 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+from backend.node.requests import NodeRequests, close_clients
+from .mock_node import start_mock_node
+
+
+async def run(users: int, port: int):
+    node = NodeRequests(address="127.0.0.1", port=port, api_key="mock-node-key")
+    names = [f"user{i}-mock" for i in range(users)]
+    await node.run_actions([{"action": "create", "name": name} for name in names])
+
+    started = time.perf_counter()
+    for name in names:
+        await node.change_user_status(name, False)
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = await node.run_actions(
+        [{"action": "activate", "name": name} for name in names]
+    )
+    batched = time.perf_counter() - started
+
+    assert all(result.success for result in results)
+    print(f"users: {users}")
+    print(f"one request per user: {single:.2f}s ({users / single:.0f} actions/s)")
+    print(f"batch requests:       {batched:.2f}s ({users / batched:.0f} actions/s)")
+    await close_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8101)
+    args = parser.parse_args()
+
+    server = start_mock_node(args.port)
+    asyncio.run(run(args.users, args.port))
+    server.should_exit = True
@@ -0,0 +1,162 @@
+"""Measures concurrent node fan-out (backend/node/fanout.py) against mock nodes.
+
+    python -m benchmarks.bench_fanout --nodes 1 5 15 --users 10 100 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+from uuid import uuid4
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from backend.db import async_crud
+from backend.db.engine import Base
+from backend.db.models import Node, User
+from backend.node.fanout import run_on_nodes
+from backend.node.requests import NodeRequests, close_clients
+from .mock_node import start_mock_node
+
+
+def percentile(values: list[float], percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def report(label: str, nodes: int, latencies: list[float], elapsed: float):
+    calls = len(latencies)
+    print(
+        f"{label:<14} nodes={nodes:<3} calls={calls:<5} "
+        f"{calls / elapsed:8.1f} calls/s {calls * nodes / elapsed:9.1f} node-req/s "
+        f"p50={percentile(latencies, 50):7.1f}ms p99={percentile(latencies, 99):7.1f}ms "
+        f"mean={statistics.mean(latencies):7.1f}ms"
+    )
+
+
+async def measure(label: str, nodes: int, calls):
+    latencies = []
+    started = time.perf_counter()
+    for call in calls:
+        call_started = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    report(label, nodes, latencies, time.perf_counter() - started)
+
+
+async def fan_out(db, call):
+    """Runs `call(node, node_requests)` on every node like the node workers do"""
+    return await run_on_nodes(await async_crud.get_all_nodes(db), call)
+
+
+async def run_actions(node, node_requests: NodeRequests, actions) -> bool:
+    node_actions = [
+        {"action": action, "name": f"{name}-{node.name}"} for name, action in actions
+    ]
+    results = await node_requests.run_actions(node_actions)
+    return all(result.success for result in results)
+
+
+async def run_scenario(db, ports: list[int], users: int):
+    await db.execute(delete(Node))
+    await db.execute(delete(User))
+    for i, port in enumerate(ports):
+        db.add(
+            Node(
+                name=f"n{i}",
+                address="127.0.0.1",
+                port=port,
+                key="mock-node-key",
+                protocol="tcp",
+                ovpn_port=1194,
+            )
+        )
+    names = [f"u{i}" for i in range(users)]
+    db.add_all(
+        User(name=name, uuid=str(uuid4()), expiry_date=date.max, owner="bench")
+        for name in names
+    )
+    await db.commit()
+
+    nodes = len(ports)
+    await measure(
+        "create",
+        nodes,
+        [
+            lambda name=name: fan_out(
+                db, lambda node, r: r.create_user(f"{name}-{node.name}")
+            )
+            for name in names
+        ],
+    )
+    await measure(
+        "change_status",
+        nodes,
+        [
+            lambda name=name: fan_out(
+                db,
+                lambda node, r: r.change_user_status(f"{name}-{node.name}", False),
+            )
+            for name in names
+        ],
+    )
+    await measure(
+        "batch_activate",
+        nodes,
+        [
+            lambda: fan_out(
+                db,
+                lambda node, r: run_actions(
+                    node, r, [(name, "activate") for name in names]
+                ),
+            )
+        ],
+    )
+    await measure(
+        "delete",
+        nodes,
+        [
+            lambda name=name: fan_out(
+                db, lambda node, r: r.delete_user(f"{name}-{node.name}")
+            )
+            for name in names
+        ],
+    )
+
+
+async def main(args):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = AsyncSession(bind=engine, expire_on_commit=False)
+
+    ports = [args.port + i for i in range(max(args.nodes))]
+    for port in ports:
+        start_mock_node(
+            port,
+            latency=args.latency,
+            failure_rate=args.failure_rate,
+            payload_size=args.payload_size,
+        )
+
+    for nodes in args.nodes:
+        for users in args.users:
+            print(f"--- {nodes} nodes, {users} users")
+            await run_scenario(db, ports[:nodes], users)
+    await db.close()
+    await engine.dispose()
+    await close_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 5, 15])
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--latency", type=float, default=0.02, help="in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--payload-size", type=int, default=4096, help="in bytes")
+    parser.add_argument("--port", type=int, default=8200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,140 @@
+"""Shows query plans and latency of the hot user and node lookups with and without indexes.
+
+    python -m benchmarks.bench_indexes --users 100000 --nodes 500
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from uuid import uuid4
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.db import async_crud
+from backend.db.engine import Base
+from backend.db.models import Node, User
+from backend.schema._input import UserFilter
+
+INDEXES = [
+    "ix_users_owner",
+    "ix_users_is_active_expiry_date",
+    "ix_nodes_name",
+]
+
+
+def seed(engine, users: int, nodes: int, owners: int):
+    today = date.today()
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User),
+            [
+                {
+                    "name": f"user{i}",
+                    "uuid": str(uuid4()),
+                    "expiry_date": today + timedelta(days=random.randint(-30, 365)),
+                    "is_active": random.random() < 0.9,
+                    "owner": f"admin{random.randrange(owners)}",
+                }
+                for i in range(users)
+            ],
+        )
+        connection.execute(
+            insert(Node),
+            [
+                {
+                    "name": f"node{i}",
+                    "address": f"10.0.{i // 250}.{i % 250}",
+                    "protocol": "tcp",
+                    "ovpn_port": 1194,
+                    "port": 9090,
+                    "key": "key",
+                }
+                for i in range(nodes)
+            ],
+        )
+
+
+def plan(engine, sql: str, params: dict) -> str:
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params)
+        return "; ".join(row[-1] for row in rows)
+
+
+async def measure(label: str, engine, session, args):
+    owner = f"admin{args.owners // 2}"
+    until = date.today() + timedelta(days=1)
+    queries = {
+        "get_users_page": (
+            lambda db: async_crud.get_users_page(db, UserFilter(owner=owner), 100),
+            "SELECT * FROM users WHERE owner = :owner ORDER BY id LIMIT 100",
+            {"owner": owner},
+        ),
+        "get_upcoming_expiry_dates": (
+            lambda db: async_crud.get_upcoming_expiry_dates(db, until),
+            "SELECT DISTINCT expiry_date FROM users "
+            "WHERE is_active = 1 AND expiry_date < :until",
+            {"until": str(until)},
+        ),
+        "get_node_by_name": (
+            lambda db: async_crud.get_node_by_name(db, f"node{args.nodes - 1}"),
+            "SELECT * FROM nodes WHERE name = :name LIMIT 1",
+            {"name": f"node{args.nodes - 1}"},
+        ),
+    }
+    print(f"--- {label}")
+    for name, (query, sql, params) in queries.items():
+        latencies, sql_latencies = [], []
+        for _ in range(args.repeat):
+            async with session() as db:
+                started = time.perf_counter()
+                await query(db)
+                latencies.append((time.perf_counter() - started) * 1000)
+            with engine.connect() as connection:
+                started = time.perf_counter()
+                connection.execute(text(sql), params).fetchall()
+                sql_latencies.append((time.perf_counter() - started) * 1000)
+        print(
+            f"{name:<26} crud p50={statistics.median(latencies):8.2f}ms "
+            f"sql p50={statistics.median(sql_latencies):8.2f}ms  "
+            f"plan: {plan(engine, sql, params)}"
+        )
+
+
+async def main(engine, path: str, args):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session = async_sessionmaker(bind=async_engine)
+
+    await measure("without indexes", engine, session, args)
+    with engine.begin() as connection:
+        for table in (User.__table__, Node.__table__):
+            for index in table.indexes:
+                if index.name in INDEXES:
+                    index.create(connection)
+        connection.execute(text("ANALYZE"))
+    await measure("with indexes", engine, session, args)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--owners", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for index in INDEXES:
+            connection.execute(text(f"DROP INDEX {index}"))
+    seed(engine, args.users, args.nodes, args.owners)
+
+    asyncio.run(main(engine, path, args))
@@ -0,0 +1,123 @@
+"""Checks and times node reconciliation against a drifted mock node.
+
+    python -m benchmarks.bench_reconcile --users 5000 --drift 0.1
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import date
+from uuid import uuid4
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from backend.db.engine import Base
+from backend.db.models import Node, NodeJob, User
+from backend.node.reconcile import reconcile_nodes
+from backend.node.requests import NodeRequests, close_clients
+from .mock_node import start_mock_node
+
+# clients made on the node by hand, reconcile must never delete them
+FOREIGN_CLIENTS = ["backup", "my laptop-mock", "x-mock", "printer_for_office-mock"]
+
+
+async def seed(db: AsyncSession, users: int, drift: float, port: int) -> dict:
+    """Creates panel users and a node whose clients differ by `drift`"""
+    db.add(
+        Node(
+            name="mock",
+            address="127.0.0.1",
+            port=port,
+            key="mock-node-key",
+            protocol="tcp",
+            ovpn_port=1194,
+        )
+    )
+    names = [f"u{i}" for i in range(users)]
+    active = {name: random.random() < 0.8 for name in names}
+    db.add_all(
+        User(
+            name=name,
+            uuid=str(uuid4()),
+            expiry_date=date.max,
+            is_active=active[name],
+            owner="bench",
+        )
+        for name in names
+    )
+    await db.commit()
+
+    expected = {
+        "create": set(),
+        "activate": set(),
+        "deactivate": set(),
+        "delete": set(),
+    }
+    actions = []
+    for name in names:
+        roll = random.random()
+        if roll < drift / 2:
+            expected["create"].add(name)
+            if not active[name]:
+                expected["deactivate"].add(name)
+            continue
+        actions.append({"action": "create", "name": f"{name}-mock"})
+        node_active = active[name]
+        if roll < drift:
+            node_active = not node_active
+            expected["activate" if active[name] else "deactivate"].add(name)
+        if not node_active:
+            actions.append({"action": "deactivate", "name": f"{name}-mock"})
+    # clients of users deleted from the panel
+    for i in range(int(users * drift / 2)):
+        actions.append({"action": "create", "name": f"gone{i}-mock"})
+        expected["delete"].add(f"gone{i}")
+    actions += [{"action": "create", "name": name} for name in FOREIGN_CLIENTS]
+
+    node = NodeRequests(address="127.0.0.1", port=port, api_key="mock-node-key")
+    results = await node.run_actions(actions)
+    assert all(result.success for result in results), "seeding the mock node failed"
+    return expected
+
+
+async def main(args):
+    random.seed(args.seed)
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = AsyncSession(bind=engine, expire_on_commit=False)
+    start_mock_node(args.port)
+    expected = await seed(db, args.users, args.drift, args.port)
+
+    started = time.perf_counter()
+    (plan,) = await reconcile_nodes(db, dry_run=True)
+    elapsed = time.perf_counter() - started
+    for action, names in expected.items():
+        planned = set(getattr(plan, action))
+        status = "ok" if planned == names else "MISMATCH"
+        print(
+            f"{action:<10} expected={len(names):<6} planned={len(planned):<6} {status}"
+        )
+    foreign = sorted(set(plan.unmanaged) & set(FOREIGN_CLIENTS))
+    print(f"unmanaged  {foreign} left alone: {foreign == sorted(FOREIGN_CLIENTS)}")
+    print(f"dry run over {args.users} users took {elapsed * 1000:.1f}ms")
+
+    await reconcile_nodes(db)
+    queued = await db.scalar(select(func.count()).select_from(NodeJob))
+    print(f"queued {queued} node jobs")
+
+    await db.close()
+    await engine.dispose()
+    await close_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--drift", type=float, default=0.1, help="share of users")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8300)
+    asyncio.run(main(parser.parse_args()))
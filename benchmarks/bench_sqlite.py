@@ -0,0 +1,114 @@
+"""Compares SQLite read and write throughput with default and tuned connection settings.
+
+    python -m benchmarks.bench_sqlite --writers 4 --readers 8 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from backend.db.engine import Base, pool_options, set_sqlite_pragmas
+from backend.db.models import User
+
+
+def build_engine(path: str, tuned: bool):
+    if not tuned:
+        return create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False}
+        )
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        **pool_options(),
+    )
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+def run_profile(label: str, tuned: bool, args):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = build_engine(path, tuned)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)
+
+    with session() as db:
+        uuids = [str(uuid4()) for _ in range(args.seed)]
+        db.add_all(
+            User(name=f"seed{i}", uuid=uuid, expiry_date=date.max, owner="bench")
+            for i, uuid in enumerate(uuids)
+        )
+        db.commit()
+
+    counters = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def count(key: str):
+        with lock:
+            counters[key] += 1
+
+    def writer(worker: int):
+        i = 0
+        while time.perf_counter() < deadline:
+            try:
+                with session() as db:
+                    db.add(
+                        User(
+                            name=f"w{worker}-{i}",
+                            uuid=str(uuid4()),
+                            expiry_date=date.max,
+                            owner="bench",
+                        )
+                    )
+                    db.commit()
+                count("writes")
+            except OperationalError:
+                count("errors")
+            i += 1
+
+    def reader():
+        while time.perf_counter() < deadline:
+            try:
+                with session() as db:
+                    db.scalar(select(User).where(User.uuid == random.choice(uuids)))
+                count("reads")
+            except OperationalError:
+                count("errors")
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    print(
+        f"{label:<8} reads={counters['reads'] / elapsed:9.1f}/s "
+        f"writes={counters['writes'] / elapsed:8.1f}/s "
+        f"locked errors={counters['errors']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=10000, help="users created first")
+    args = parser.parse_args()
+    run_profile("default", False, args)
+    run_profile("tuned", True, args)
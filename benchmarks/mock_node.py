@@ -0,0 +1,151 @@
+"""In-memory stand-in for an OV-Node, implementing the /sync API used by NodeRequests.
+
+Run it standalone with:
+
+    python -m benchmarks.mock_node --port 8001 --latency 0.05 --failure-rate 0.01
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+
+class UserAction(BaseModel):
+    name: str
+    status: str | None = None
+
+
+class BatchRequest(BaseModel):
+    actions: list[dict]
+
+
+def create_app(
+    key: str,
+    latency: float = 0.0,
+    failure_rate: float = 0.0,
+    payload_size: int = 4096,
+) -> FastAPI:
+    """Builds a mock node.
+
+    Every request waits `latency` seconds (+-50% jitter) and fails with a 500
+    response with probability `failure_rate`. Profiles are padded to
+    `payload_size` bytes.
+    """
+    app = FastAPI()
+    clients: dict[str, bool] = {}
+
+    @app.middleware("http")
+    async def simulate_network(request, call_next):
+        if latency:
+            await asyncio.sleep(latency * random.uniform(0.5, 1.5))
+        if random.random() < failure_rate:
+            return PlainTextResponse("simulated failure", status_code=500)
+        return await call_next(request)
+
+    def check_key(value: str | None):
+        if value != key:
+            raise HTTPException(status_code=401, detail="invalid key")
+
+    def apply(action: str, name: str) -> dict:
+        if action == "create":
+            clients.setdefault(name, True)
+        elif action in ("activate", "deactivate"):
+            if name not in clients:
+                return {"success": False, "msg": "user not found"}
+            clients[name] = action == "activate"
+        elif action == "delete":
+            clients.pop(name, None)
+        else:
+            return {"success": False, "msg": f"unknown action: {action}"}
+        return {"success": True, "msg": None}
+
+    @app.post("/sync/get-status")
+    async def get_status(key: str | None = Header(default=None)):
+        check_key(key)
+        return {"success": True, "data": {"users": len(clients)}}
+
+    @app.post("/sync/create-user")
+    async def create_user(request: UserAction, key: str | None = Header(default=None)):
+        check_key(key)
+        return apply("create", request.name)
+
+    @app.post("/sync/change-user-status")
+    async def change_user_status(
+        request: UserAction, key: str | None = Header(default=None)
+    ):
+        check_key(key)
+        return apply(request.status, request.name)
+
+    @app.post("/sync/delete-user")
+    async def delete_user(request: UserAction, key: str | None = Header(default=None)):
+        check_key(key)
+        return apply("delete", request.name)
+
+    @app.get("/sync/list-users")
+    async def list_users(key: str | None = Header(default=None)):
+        check_key(key)
+        return {
+            "success": True,
+            "data": [
+                {"name": name, "active": active} for name, active in clients.items()
+            ],
+        }
+
+    @app.post("/sync/batch")
+    async def batch(request: BatchRequest, key: str | None = Header(default=None)):
+        check_key(key)
+        return {
+            "success": True,
+            "data": [
+                apply(item.get("action"), item.get("name")) for item in request.actions
+            ],
+        }
+
+    @app.get("/sync/download/ovpn/{name}")
+    async def download_ovpn(name: str, key: str | None = Header(default=None)):
+        check_key(key)
+        if name not in clients:
+            raise HTTPException(status_code=404)
+        profile = f"client\nremote mock-node 1194\n# {name}\n"
+        profile += "#" * max(0, payload_size - len(profile) - 1) + "\n"
+        return PlainTextResponse(profile, media_type="application/x-openvpn-profile")
+
+    return app
+
+
+def start_mock_node(port: int, key: str = "mock-node-key", **options) -> uvicorn.Server:
+    """Starts a mock node on 127.0.0.1:port in a background thread."""
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_app(key, **options),
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+        )
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--key", default="mock-node-key")
+    parser.add_argument("--latency", type=float, default=0.0, help="in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--payload-size", type=int, default=4096, help="in bytes")
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.key, args.latency, args.failure_rate, args.payload_size),
+        host="127.0.0.1",
+        port=args.port,
+    )
@@ -37,7 +37,7 @@ const StatCard = ({ icon, label, value, subValue, className, color }) => {
 const ServerStats = () => {
   const [stats, setStats] = useState(null);
   const [nodes, setNodes] = useState([]);
-  const [users, setUsers] = useState([]);
+  const [userStats, setUserStats] = useState({ total: 0, active: 0, inactive: 0 });
   const { t } = useTranslation();
 
   const nodeStats = useMemo(() => {
@@ -49,15 +49,6 @@ const ServerStats = () => {
     };
   }, [nodes]);
 
-  const userStats = useMemo(() => {
-    const activeUsers = users.filter(user => user.is_active).length;
-    const inactiveUsers = users.length - activeUsers;
-    return {
-      total: users.length,
-      active: activeUsers,
-      inactive: inactiveUsers,
-    };
-  }, [users]);
 
   useEffect(() => {
     const fetchServerData = async () => {
@@ -85,9 +76,10 @@ const ServerStats = () => {
 
     const fetchUsers = async () => {
       try {
-        const response = await apiClient.get('/users/');
-        if (response.data.success) {
-          setUsers(response.data.data || []);
+        const response = await apiClient.get('/users/', { params: { limit: 1 } });
+        if (response.data.success && response.data.data) {
+          const { total, active } = response.data.data;
+          setUserStats({ total, active, inactive: total - active });
         }
       } catch (error) {
         console.error("Error fetching users:", error);
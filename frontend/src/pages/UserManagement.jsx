@@ -1,4 +1,4 @@
-import { useState, useEffect, useMemo } from 'react';
+import { useState, useEffect } from 'react';
 import apiClient from '../services/api';
 import UserTable from '../components/UserTable';
 import AddUserModal from '../components/AddUserModal';
@@ -24,12 +24,29 @@ const UserManagement = () => {
 
   const [searchTerm, setSearchTerm] = useState('');
   const [currentPage, setCurrentPage] = useState(1);
+  // cursors[i] is the cursor of page i + 1, the first page has none
+  const [cursors, setCursors] = useState([null]);
+  const [totalUsers, setTotalUsers] = useState(0);
+  const [userStats, setUserStats] = useState({ total: 0, active: 0, inactive: 0 });
 
-  const fetchUsers = async () => {
+  const fetchUsers = async (page = currentPage, search = searchTerm) => {
     try {
-      const response = await apiClient.get('/users/');
-      if (response.data.success && Array.isArray(response.data.data)) {
-        setUsers(response.data.data.slice().reverse());
+      const params = { limit: ITEMS_PER_PAGE, order: 'desc' };
+      if (search) params.search = search;
+      if (cursors[page - 1]) params.cursor = cursors[page - 1];
+      const response = await apiClient.get('/users/', { params });
+      if (response.data.success && response.data.data) {
+        const { users, next_cursor, total, active } = response.data.data;
+        setUsers(users);
+        setTotalUsers(total);
+        setCursors(prev => {
+          const next = prev.slice(0, page);
+          if (next_cursor) next.push(next_cursor);
+          return next;
+        });
+        if (!search) {
+          setUserStats({ total, active, inactive: total - active });
+        }
       } else {
         setUsers([]);
       }
@@ -51,36 +68,23 @@ const UserManagement = () => {
   };
 
   useEffect(() => {
-    fetchUsers();
     fetchSubscriptionSettings();
   }, []);
 
-  const userStats = useMemo(() => {
-    const activeUsersCount = users.filter(user => user.is_active).length;
-    const inactiveUsersCount = users.length - activeUsersCount;
-    return {
-      total: users.length,
-      active: activeUsersCount,
-      inactive: inactiveUsersCount,
-    };
-  }, [users]);
-
-  // Filter and Paginate Data
-  const filteredUsers = useMemo(() => {
-    return users.filter(user =>
-      user.name.toLowerCase().includes(searchTerm.toLowerCase())
-    );
-  }, [users, searchTerm]);
-
-  const totalPages = Math.ceil(filteredUsers.length / ITEMS_PER_PAGE);
-
-  const paginatedUsers = useMemo(() => {
-    const startIndex = (currentPage - 1) * ITEMS_PER_PAGE;
-    return filteredUsers.slice(startIndex, startIndex + ITEMS_PER_PAGE);
-  }, [filteredUsers, currentPage]);
+  useEffect(() => {
+    fetchUsers(currentPage, searchTerm);
+  }, [currentPage, searchTerm]);
+
+  const totalPages = Math.ceil(totalUsers / ITEMS_PER_PAGE);
+
+  const handlePageChange = (page) => {
+    if (page > currentPage && !cursors[page - 1]) return;
+    setCurrentPage(page);
+  };
 
   const handleSearchChange = (event) => {
     setSearchTerm(event.target.value);
+    setCursors([null]);
     setCurrentPage(1);
   };
 
@@ -194,12 +198,12 @@ const UserManagement = () => {
         <Pagination
           currentPage={currentPage}
           totalPages={totalPages}
-          onPageChange={setCurrentPage}
+          onPageChange={handlePageChange}
         />
       </div>
 
       <UserTable
-        users={paginatedUsers}
+        users={users}
         onDelete={handleDelete}
         onDownload={handleOpenDownloadModal}
         onEdit={handleEdit}
@@ -1,5 +1,5 @@
 import os
-import requests
+import httpx
 import sys
 import subprocess
 import shutil
@@ -247,7 +247,7 @@ def refresh_panel():
         backup_env = "/tmp/ovpanel_env_backup"
         backup_data = "/tmp/ovpanel_data_backup"
 
-        response = requests.get(repo)
+        response = httpx.get(repo, follow_redirects=True)
         response.raise_for_status()
         release = response.json()
         download_url = release["tarball_url"]